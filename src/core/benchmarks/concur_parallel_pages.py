@@ -0,0 +1,60 @@
+"""
+Serial NextPage walking vs the parallel offset pager of SAPConcurClient.
+
+Starts benchmarks.mock_concur_server with injected per-request latency and pulls
+the same endpoint with request_ and with parallel_request_.
+
+Run from src/core:
+
+    python -m benchmarks.concur_parallel_pages
+"""
+import time
+
+from benchmarks.mock_concur_server import start_server
+from clients.concur_ import SAPConcurClient
+
+ITEMS = 3000
+LATENCY = 0.05
+WORKERS = 8
+
+
+def _client(url):
+    client = SAPConcurClient(pool_maxsize=WORKERS)
+    client.geolocation = url
+    client.access_token = "token"
+    return client
+
+
+def _timed(func, *args, **kwargs):
+    start = time.monotonic()
+    items, _ = func(*args, **kwargs)
+    return len(items), time.monotonic() - start
+
+
+def main():
+    server = start_server(items=ITEMS, latency=LATENCY)
+    url = f"http://127.0.0.1:{server.server_port}"
+    print(f"{ITEMS} items, 100 per page, {LATENCY * 1000:.0f} ms latency per request\n")
+
+    with _client(url) as client:
+        rows = [
+            ("serial NextPage (request_)",)
+            + _timed(client.request_, "api/v3.0/expense/entries?limit=100"),
+            (f"parallel offsets, {WORKERS} workers",)
+            + _timed(
+                client.parallel_request_,
+                "api/v3.0/expense/entries",
+                max_workers=WORKERS,
+            ),
+            ("cursor-only fallback",)
+            + _timed(client.parallel_request_, "cursor/api/v3.0/expense/entries"),
+        ]
+
+    print(f"{'pager':<34}{'items':>8}{'seconds':>10}")
+    for name, count, seconds in rows:
+        print(f"{name:<34}{count:>8}{seconds:>10.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
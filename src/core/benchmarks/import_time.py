@@ -0,0 +1,89 @@
+"""
+Import-time budget check for every module in src/core/clients, subpackages included.
+
+Each module is imported in a fresh interpreter under `python -X importtime` and
+its cumulative import time is compared against a budget. Modules whose
+third-party dependencies are not installed are reported as skipped. Exits
+non-zero when any module is over budget.
+
+Run from src/core:
+
+    python -m benchmarks.import_time --budget-ms 400
+"""
+import argparse
+import os
+import pkgutil
+import subprocess
+import sys
+
+CLIENTS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "clients")
+
+
+def client_modules():
+    """
+    Every module under clients, subpackages included. walk_packages imports each
+    package to find its submodules; a package that fails to import is not descended
+    into, and import_time_us reports it as skipped.
+    """
+    return sorted(
+        module.name
+        for module in pkgutil.walk_packages(
+            [CLIENTS_DIR], prefix="clients.", onerror=lambda name: None
+        )
+    )
+
+
+def import_time_us(module, repeat=3):
+    """
+    :returns: The best cumulative import time in microseconds, or None if the import failed
+    """
+    # no SKY_API_* variables: importing must not depend on configuration
+    env = {
+        k: v for k, v in os.environ.items() if not k.startswith("SKY_API_")
+    }
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=os.path.dirname(CLIENTS_DIR),
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode:
+            return None
+        for line in result.stderr.splitlines():
+            # "import time: self [us] | cumulative | imported package"
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                cumulative = int(parts[1])
+                best = cumulative if best is None else min(best, cumulative)
+
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget-ms", type=float, default=400.0)
+    parser.add_argument("modules", nargs="*", help="defaults to every client module")
+    args = parser.parse_args()
+
+    over_budget = []
+    print(f"{'module':<52}{'ms':>10}")
+    for module in args.modules or client_modules():
+        micros = import_time_us(module)
+        if micros is None:
+            print(f"{module:<52}{'skipped':>10}")
+            continue
+        millis = micros / 1000
+        flag = "  OVER BUDGET" if millis > args.budget_ms else ""
+        print(f"{module:<52}{millis:>10.1f}{flag}")
+        if flag:
+            over_budget.append(module)
+
+    if over_budget:
+        sys.exit(f"{len(over_budget)} module(s) over the {args.budget_ms:g} ms budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+A local stand-in for Concur v3 list endpoints with injected latency.
+
+GET /<any path>?offset=N&limit=M returns that slice of a fixed number of fake
+items with a NextPage link. Paths under /cursor/ omit TotalCount, like
+cursor-only endpoints.
+
+Run standalone from src/core:
+
+    python -m benchmarks.mock_concur_server --port 8766 --items 5000 --latency 0.1
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def _handler(total, latency, max_limit):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            parts = urlsplit(self.path)
+            query = parse_qs(parts.query)
+            offset = int(query.get("offset", ["0"])[0])
+            limit = min(int(query.get("limit", [str(max_limit)])[0]), max_limit)
+
+            items = [{"ID": str(i)} for i in range(offset, min(offset + limit, total))]
+            body = {"Items": items, "NextPage": None}
+            if offset + limit < total:
+                host = self.headers.get("Host")
+                body["NextPage"] = (
+                    f"http://{host}{parts.path}?offset={offset + limit}&limit={limit}"
+                )
+            if not parts.path.startswith("/cursor/"):
+                body["TotalCount"] = total
+
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections under concurrent benchmarks
+    request_queue_size = 1024
+
+
+def start_server(port=0, items=5000, latency=0.1, max_limit=100):
+    """
+    Start the mock server on a background thread
+    :returns: The running server; its url is `http://127.0.0.1:{server.server_port}`
+    """
+    server = _Server(("127.0.0.1", port), _handler(items, latency, max_limit))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds per request")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.items, args.latency)
+    print(f"Mock Concur API listening on http://127.0.0.1:{server.server_port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+A local stand-in for the SKY API that enforces a per-subscription request quota.
+
+Requests over the quota get a 429 with a Retry-After header, like the real API.
+Every other GET returns a page of fake journal entries and every POST echoes
+its body back.
+
+Run standalone from src/core:
+
+    python -m benchmarks.mock_sky_server --port 8765 --quota 10
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Quota:
+    """Fixed one-second windows, like the SKY per-subscription rate limit"""
+
+    def __init__(self, per_second):
+        self.per_second = per_second
+        self._window = int(time.time())
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def take(self):
+        """
+        :returns: None when the request is allowed, otherwise the seconds until the next window
+        """
+        with self._lock:
+            now = time.time()
+            if int(now) != self._window:
+                self._window = int(now)
+                self._count = 0
+            if self._count < self.per_second:
+                self._count += 1
+                return None
+            return max(0.0, self._window + 1 - now)
+
+
+def _handler(quota, latency):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _reply(self, status, body, headers=None):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _throttled(self):
+            wait = quota.take()
+            if wait is None:
+                return False
+            self._reply(
+                429,
+                {"statusCode": 429, "message": "Rate limit is exceeded."},
+                {"Retry-After": f"{wait:.3f}"},
+            )
+            return True
+
+        def do_GET(self):
+            if self._throttled():
+                return
+            time.sleep(latency)
+            self._reply(200, {"count": 1, "value": [{"id": 1, "path": self.path}]})
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            if self._throttled():
+                return
+            time.sleep(latency)
+            self._reply(200, json.loads(body or b"{}"))
+
+    return Handler
+
+
+class _Server(ThreadingHTTPServer):
+    # the default backlog of 5 drops connections under concurrent benchmarks
+    request_queue_size = 1024
+
+
+def start_server(port=0, quota=10, latency=0.0):
+    """
+    Start the mock server on a background thread
+    :returns: The running server; its url is `http://127.0.0.1:{server.server_port}/`
+    """
+    server = _Server(("127.0.0.1", port), _handler(_Quota(quota), latency))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--quota", type=int, default=10, help="requests per second")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per request")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.quota, args.latency)
+    print(f"Mock SKY API listening on http://127.0.0.1:{server.server_port}/")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
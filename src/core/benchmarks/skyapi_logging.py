@@ -0,0 +1,80 @@
+"""
+Per-request logging overhead of SkyAPIClient in each log mode.
+
+Run from src/core:
+
+    python -m benchmarks.skyapi_logging
+"""
+import logging
+import os
+import timeit
+
+import requests
+
+from clients.financial_edge_.skyapiclient import (
+    LOG_FULL,
+    LOG_NONE,
+    LOG_TRUNCATED,
+    SkyAPIClient,
+)
+
+os.environ.setdefault("SKY_API_ENDPOINT", "https://api.sky.blackbaud.com/")
+
+BODY_SIZES = [1_000, 100_000, 5_000_000]
+NUMBER = 50
+
+
+class _StubSession:
+    """Returns a canned response so only client-side overhead is measured"""
+
+    def __init__(self, response):
+        self.response = response
+
+    def request(self, **kwargs):
+        return self.response
+
+    def close(self):
+        pass
+
+
+def _response(size):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"value": "' + b"x" * size + b'"}'
+    return response
+
+
+def _time_request(log_mode, level, size):
+    client = SkyAPIClient(
+        access_token="token",
+        subscription_key="key",
+        request_type="SKY_API_ENDPOINT",
+        log_mode=log_mode,
+    )
+    client.session = _StubSession(_response(size))
+    logging.getLogger("SkyApiLogger").setLevel(level)
+
+    seconds = timeit.timeit(
+        lambda: client._make_request(method="GET", url=client.base_url),
+        number=NUMBER,
+    )
+    return seconds / NUMBER * 1e6
+
+
+def main():
+    logger = logging.getLogger("SkyApiLogger")
+    logger.propagate = False
+    logger.addHandler(logging.StreamHandler(open(os.devnull, "w")))
+
+    print(f"{'mode':<10}{'level':<8}{'body bytes':>12}{'us/request':>14}")
+    for size in BODY_SIZES:
+        for level in (logging.INFO, logging.DEBUG):
+            for mode in (LOG_NONE, LOG_TRUNCATED, LOG_FULL):
+                micros = _time_request(mode, level, size)
+                print(
+                    f"{mode:<10}{logging.getLevelName(level):<8}{size:>12}{micros:>14.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
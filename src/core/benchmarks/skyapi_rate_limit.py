@@ -0,0 +1,78 @@
+"""
+SkyAPIClient behaviour when offered twice the subscription quota.
+
+Starts benchmarks.mock_sky_server, then sends requests at 2x its quota with and
+without the client-side rate limiter and reports success, counters and wall time.
+
+Run from src/core:
+
+    python -m benchmarks.skyapi_rate_limit
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mock_sky_server import start_server
+from clients.financial_edge_.skyapiclient import SkyAPIClient, SkyAPIError
+
+QUOTA = 10
+SECONDS = 5
+WORKERS = 20
+
+SCENARIOS = [
+    ("no limiter, no retries", dict(rate_limit=None, max_retries=0)),
+    ("no limiter, backoff retries", dict(rate_limit=None, max_retries=5)),
+    ("rate limiter + retries", dict(rate_limit=QUOTA, max_retries=5)),
+]
+
+
+def _run(options):
+    client = SkyAPIClient(
+        access_token="token",
+        subscription_key="key",
+        request_type="SKY_API_ENDPOINT",
+        pool_maxsize=WORKERS,
+        backoff_base=0.1,
+        log_mode="none",
+        **options,
+    )
+    total = 2 * QUOTA * SECONDS
+    interval = 1.0 / (2 * QUOTA)
+
+    def call(i):
+        # open-loop arrivals at twice the quota
+        time.sleep(max(0.0, start + i * interval - time.monotonic()))
+        try:
+            client._get("generalledger/v1/journalentries")
+            return True
+        except SkyAPIError:
+            return False
+
+    with client, ThreadPoolExecutor(max_workers=WORKERS) as executor:
+        start = time.monotonic()
+        succeeded = sum(executor.map(call, range(total)))
+        elapsed = time.monotonic() - start
+
+    return total, succeeded, elapsed, client.counters
+
+
+def main():
+    server = start_server(quota=QUOTA)
+    url = f"http://127.0.0.1:{server.server_port}/"
+    os.environ["SKY_API_ENDPOINT"] = url
+    print(f"quota {QUOTA} req/s, offered {2 * QUOTA} req/s for {SECONDS}s\n")
+    print(
+        f"{'scenario':<30}{'ok':>8}{'elapsed s':>11}"
+        f"{'throttled':>11}{'retried':>9}{'failed':>8}"
+    )
+    for name, options in SCENARIOS:
+        total, succeeded, elapsed, counters = _run(options)
+        print(
+            f"{name:<30}{f'{succeeded}/{total}':>8}{elapsed:>11.2f}"
+            f"{counters['throttled']:>11}{counters['retried']:>9}{counters['failed']:>8}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import asyncio
+
+import httpx
+
+from .hivebrite_ import HivebriteClient
+
+
+class AsyncHivebriteClient:
+    """Async counterpart of HivebriteClient, built on httpx.
+
+    get_ and post_ mirror the sync client and return the same ("success" | "error", data)
+    tuples. Configuration and tokens come from a wrapped HivebriteClient, so sync and
+    async clients share one token and one refresh; the blocking token calls run in a
+    worker thread, never on the event loop. `map` runs many calls at once with a
+    concurrency limit.
+    """
+
+    def __init__(
+        self,
+        max_connections=10,
+        max_keepalive_connections=10,
+        timeout=2000,
+        hivebrite_client=None,
+    ):
+        """
+        Args:
+            max_connections (int): Connection limit for the Hivebrite host.
+            max_keepalive_connections (int): Idle connections kept open between calls.
+            timeout (int): Seconds per request.
+            hivebrite_client (HivebriteClient, optional): Source of the root and tokens.
+                Created on the first request when not given.
+        """
+        self.hivebrite_client = hivebrite_client
+        self._init_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self):
+        await self.client.aclose()
+
+    async def _hivebrite(self):
+        if self.hivebrite_client is None:
+            async with self._init_lock:
+                if self.hivebrite_client is None:
+                    # HivebriteClient() fetches a token: keep it off the event loop
+                    self.hivebrite_client = await asyncio.to_thread(HivebriteClient)
+        return self.hivebrite_client
+
+    async def _auth_headers_async(self, stale_token=None):
+        hivebrite = await self._hivebrite()
+        if stale_token or not hivebrite._is_fresh(hivebrite.auth):
+            # the shared token lock is a threading lock: wait for it off the event loop
+            hivebrite.auth = await asyncio.to_thread(hivebrite.token, stale_token)
+        return {"Authorization": f"Bearer {hivebrite.auth['access_token']}"}
+
+    @staticmethod
+    def _form(data):
+        """Form values as requests would send them (True as "True", not httpx's "true")"""
+        if data is None:
+            return None
+        return {
+            key: [str(v) for v in value] if isinstance(value, list) else str(value)
+            for key, value in data.items()
+        }
+
+    async def make_request(self, method, url, **kwargs):
+        """Makes the request, renewing the token and retrying once when it is rejected
+        Returns:
+            tuple: ("success", body) or ("error", message), like HivebriteClient.make_request
+        """
+        try:
+            headers = await self._auth_headers_async()
+            req = await self.client.request(method, url, headers=headers, **kwargs)
+            if req.status_code == 401:
+                for value in (kwargs.get("files") or {}).values():
+                    (value[1] if isinstance(value, tuple) else value).seek(0)
+                headers = await self._auth_headers_async(HivebriteClient._sent_token(headers))
+                req = await self.client.request(method, url, headers=headers, **kwargs)
+
+            req.raise_for_status()
+            return ("success", req.json())
+        except httpx.HTTPStatusError as exc:
+            return ("error", f"{exc.response.status_code} {str(exc)}")
+        except Exception as exc:
+            return ("error", f"{str(exc)}")
+
+    async def get_(self, endpoint):
+        """standard get request"""
+        root = (await self._hivebrite()).root
+        return await self.make_request("GET", f"{root}{endpoint}")
+
+    async def post_(self, endpoint, data=None, files=None):
+        """standard post request; httpx streams files from disk"""
+        root = (await self._hivebrite()).root
+        return await self.make_request(
+            "POST", f"{root}{endpoint}", data=self._form(data), files=files
+        )
+
+    async def map(self, func, items, concurrency=8, return_exceptions=False):
+        """Await func(item) for every item, at most `concurrency` at a time.
+
+        Args:
+            func: A coroutine function, e.g. `lambda user: client.post_(...)`.
+            items (iterable): The arguments.
+            concurrency (int): Calls in flight at once.
+            return_exceptions (bool): Put exceptions in the results instead of raising the first.
+
+        Returns:
+            list: The results, in the order of `items`.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def call(item):
+            async with semaphore:
+                return await func(item)
+
+        return await asyncio.gather(
+            *(call(item) for item in items), return_exceptions=return_exceptions
+        )
@@ -1,9 +1,14 @@
 import functools
 import json
 import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 # load .env file
 load_dotenv()
@@ -31,13 +36,14 @@ def authentication_handler(func):
     @functools.wraps(func)
     def wrapper(sap_concur_client, *args, **kwargs):
         try:
+            used_token = kwargs.get("token") or sap_concur_client.access_token
             response = func(sap_concur_client, *args, **kwargs)
             if response.status_code in [401, 403]:
                 print("Access token expired. Refreshing token...")
                 (
                     new_access_token,
                     new_refresh_token,
-                ) = sap_concur_client.refresh_access_token()
+                ) = sap_concur_client.refresh_access_token(stale_token=used_token)
                 if new_access_token:
                     if "headers" in kwargs:
                         kwargs["headers"][
@@ -61,8 +67,56 @@ def authentication_handler(func):
     return wrapper
 
 
+class ConcurSyncStore:
+    """Local SQLite store of per-endpoint high-water marks for incremental syncs."""
+
+    def __init__(self, path=None):
+        self.path = path or os.getenv("CONCUR_SYNC_STATE", ".concur_sync.sqlite")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS watermarks ("
+            "endpoint TEXT PRIMARY KEY, watermark TEXT, boundary_ids TEXT)"
+        )
+
+    def _execute(self, sql, params=()):
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchone()
+        finally:
+            conn.close()
+
+    def get(self, endpoint):
+        """Returns the watermark and the ids of the records sitting exactly on it."""
+        row = self._execute(
+            "SELECT watermark, boundary_ids FROM watermarks WHERE endpoint = ?",
+            (endpoint,),
+        )
+        if not row:
+            return None, set()
+        return json.loads(row[0]), set(json.loads(row[1]))
+
+    def set(self, endpoint, watermark, boundary_ids):
+        self._execute(
+            "INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?)",
+            (endpoint, json.dumps(watermark), json.dumps(sorted(boundary_ids))),
+        )
+
+
+def with_query_param(endpoint, name, value):
+    """Adds or replaces a query string parameter on an endpoint or url."""
+    parts = urlsplit(endpoint)
+    query = [(k, v) for k, v in parse_qsl(parts.query) if k != name]
+    query.append((name, value))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
 class SAPConcurClient:
-    def __init__(self):
+    # Tokens refreshed by any instance, keyed by client_id, so concurrent callers that
+    # hit a 401 share one refresh instead of each rotating the refresh token.
+    _refresh_lock = threading.Lock()
+    _shared_tokens = {}
+
+    def __init__(self, connect_timeout=10, read_timeout=120, pool_maxsize=10):
         self.client_id = os.getenv("CONCUR_CLIENT_ID")
         self.client_secret = os.getenv("CONCUR_CLIENT_SECRET")
         self.uuid = os.getenv("CONCUR_UUID")
@@ -70,6 +124,25 @@ class SAPConcurClient:
         self.refresh_token = os.getenv("CONCUR_REFRESH_TOKEN")
         self.access_token = os.getenv("CONCUR_ACCESS_TOKEN")
         self.geolocation = os.getenv("CONCUR_GEOLOCATION")
+        # start from the latest refreshed token rather than the one in the environment
+        shared = SAPConcurClient._shared_tokens.get(self.client_id)
+        if shared:
+            self.access_token, self.refresh_token = shared
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
 
     def get_access_token(self):
         """This function should only be used once every 6 months, and only after
@@ -89,7 +162,9 @@ class SAPConcurClient:
             "client_secret": self.client_secret,
             "credtype": "authtoken",
         }
-        response = requests.post(url, headers=headers, data=data, timeout=3000)
+        response = self.session.post(
+            url, headers=headers, data=data, timeout=self.timeout
+        )
         if response.status_code == 200:
             response_data = response.json()
             self.access_token = response_data["access_token"]  # expires in 1 hour
@@ -101,32 +176,50 @@ class SAPConcurClient:
             print("Failed to get access token:", response.text)
             return None, None
 
-    def refresh_access_token(self):
+    def refresh_access_token(self, stale_token=None):
         """Use this to refresh the access token every hour. Use the refresh_token,
-        which expires every 6 months, to obtain a new access_token"""
-        if not self.refresh_token:
-            print("No refresh token available.")
-            return None
-
-        url = "https://us2.api.concursolutions.com/oauth2/v0/token"
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded",
-        }
-        data = {
-            "client_id": self.client_id,
-            "client_secret": self.client_secret,
-            "grant_type": "refresh_token",
-            "refresh_token": self.refresh_token,
-        }
-        response = requests.post(url, headers=headers, data=data, timeout=3000)
-        if response.status_code == 200:
-            response_data = response.json()
-            self.access_token = response_data["access_token"]
-            self.refresh_token = response_data.get("refresh_token")
-            return self.access_token, self.refresh_token
-        else:
-            print("Failed to refresh access token:", response.text)
-            return None, None
+        which expires every 6 months, to obtain a new access_token.
+
+        Refreshes are single-flight: callers wait on one lock, and a caller whose
+        `stale_token` was already replaced by another caller's refresh reuses that
+        token instead of making a new request."""
+        with SAPConcurClient._refresh_lock:
+            shared = SAPConcurClient._shared_tokens.get(self.client_id)
+            if shared and stale_token and shared[0] != stale_token:
+                self.access_token, self.refresh_token = shared
+                return shared
+
+            if not self.refresh_token:
+                print("No refresh token available.")
+                return None, None
+
+            url = "https://us2.api.concursolutions.com/oauth2/v0/token"
+            headers = {
+                "Content-Type": "application/x-www-form-urlencoded",
+            }
+            data = {
+                "client_id": self.client_id,
+                "client_secret": self.client_secret,
+                "grant_type": "refresh_token",
+                "refresh_token": (shared or (None, self.refresh_token))[1],
+            }
+            response = self.session.post(
+                url, headers=headers, data=data, timeout=self.timeout
+            )
+            if response.status_code == 200:
+                response_data = response.json()
+                self.access_token = response_data["access_token"]
+                self.refresh_token = (
+                    response_data.get("refresh_token") or data["refresh_token"]
+                )
+                SAPConcurClient._shared_tokens[self.client_id] = (
+                    self.access_token,
+                    self.refresh_token,
+                )
+                return self.access_token, self.refresh_token
+            else:
+                print("Failed to refresh access token:", response.text)
+                return None, None
 
     @authentication_handler
     def make_(
@@ -146,8 +239,8 @@ class SAPConcurClient:
             headers["Authorization"] = f"Bearer {token if token else self.access_token}"
 
         headers["Accept"] = "application/json"
-        response = requests.request(
-            method, url, headers=headers, data=data, timeout=2000
+        response = self.session.request(
+            method, url, headers=headers, data=data, timeout=self.timeout
         )
 
         return response
@@ -182,6 +275,158 @@ class SAPConcurClient:
     @paginate
     def request_(self, *args, **kwargs):
         """Request handler for concur client"""
+        return self.request_page_(*args, **kwargs)
+
+    def iter_request_(self, endpoint, token=None, cursor=None, prefetch=False, on_page=None):
+        """Stream items page by page instead of collecting every page in memory.
+
+        Args:
+            endpoint (str): The endpoint of the first page.
+            token (str, optional): Access token to use instead of self.access_token.
+            cursor (str, optional): A saved NextPage url to resume from instead of `endpoint`.
+            prefetch (bool, optional): Fetch the next page on a background thread while
+                the current page is consumed.
+            on_page (callable, optional): Called with the NextPage url (None on the last page)
+                once every item of a page has been yielded. Persist it and pass it back as
+                `cursor` to resume after a crash; at most one page is replayed.
+
+        Yields:
+            dict: One item at a time.
+        """
+
+        def fetch(page_endpoint, page_token):
+            response, new_token_ = self.request_page_(page_endpoint, token=page_token)
+            return response.get("Items", []), response.get("NextPage", None), new_token_
+
+        current_endpoint = cursor or endpoint
+        if not prefetch:
+            while current_endpoint:
+                items, current_endpoint, token = fetch(current_endpoint, token)
+                yield from items
+                if on_page:
+                    on_page(current_endpoint)
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(fetch, current_endpoint, token)
+            while future:
+                items, next_page_url, token = future.result()
+                future = (
+                    executor.submit(fetch, next_page_url, token) if next_page_url else None
+                )
+                yield from items
+                if on_page:
+                    on_page(next_page_url)
+
+    def parallel_request_(
+        self,
+        endpoint,
+        limit=100,
+        max_workers=8,
+        total_field="TotalCount",
+        token=None,
+    ):
+        """Fetch every page of an offset/limit endpoint concurrently.
+
+        The first page is requested with offset=0 to learn the total count, then the
+        remaining offsets are fanned out over a bounded worker pool and merged in order.
+        Endpoints that do not report `total_field` (cursor-only paging) fall back to
+        walking NextPage serially. Keep `max_workers` at or below the client's pool_maxsize.
+
+        Args:
+            endpoint (str): The endpoint, e.g. "api/v3.0/expense/entries".
+            limit (int, optional): Items per page.
+            max_workers (int, optional): Pages fetched at once.
+            total_field (str, optional): The response field holding the total item count.
+
+        Returns:
+            tuple: All items in order, and the access token used.
+        """
+        first_page = with_query_param(with_query_param(endpoint, "limit", limit), "offset", 0)
+        response, token = self.request_page_(first_page, token=token)
+        all_data = list(response.get("Items", []))
+        total = response.get(total_field)
+
+        if total is None:
+            next_page_url = response.get("NextPage", None)
+            if next_page_url:
+                all_data.extend(self.iter_request_(next_page_url, token=token))
+            return all_data, token
+
+        def fetch(offset):
+            page = with_query_param(first_page, "offset", offset)
+            page_response, _ = self.request_page_(page, token=token)
+            return page_response.get("Items", [])
+
+        # step by the page size the server actually returned, which may be capped below limit
+        page_size = len(all_data)
+        if not page_size:
+            return all_data, token
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for items in executor.map(fetch, range(page_size, int(total), page_size)):
+                all_data.extend(items)
+
+        return all_data, token
+
+    def sync(
+        self,
+        endpoint,
+        watermark_field="LastModifiedDate",
+        id_field="ID",
+        filter_param="modifiedDateAfter",
+        store=None,
+        token=None,
+    ):
+        """Incrementally sync an endpoint, returning only records changed since the last sync.
+
+        The high-water mark (the largest `watermark_field` seen) is kept per endpoint in a
+        ConcurSyncStore and sent back as `filter_param`, so only newer records are transferred.
+        The filter is inclusive of the watermark, so records on the boundary that were already
+        returned by the previous sync are dropped by id. The watermark only advances once the
+        whole endpoint has been read, so a failed sync is simply retried from the old mark.
+
+        Args:
+            endpoint (str): The endpoint to sync, e.g. "api/v3.0/expense/reports".
+            watermark_field (str, optional): The modified date (or increasing id) field.
+            id_field (str, optional): The unique record id used to dedupe boundary records.
+            filter_param (str, optional): The query parameter that filters on the watermark.
+                Pass None for endpoints without one; records are then only filtered locally.
+            store (ConcurSyncStore, optional): Defaults to the store at $CONCUR_SYNC_STATE.
+
+        Returns:
+            list: The new or changed records.
+        """
+        store = store or ConcurSyncStore()
+        watermark, boundary_ids = store.get(endpoint)
+
+        request_endpoint = endpoint
+        if watermark is not None and filter_param:
+            request_endpoint = with_query_param(endpoint, filter_param, watermark)
+
+        deltas = []
+        new_watermark, new_boundary_ids = watermark, set(boundary_ids)
+        for item in self.iter_request_(request_endpoint, token=token):
+            value = item.get(watermark_field)
+            if value is None:
+                continue
+            if watermark is not None and (
+                value < watermark
+                or (value == watermark and item.get(id_field) in boundary_ids)
+            ):
+                continue
+
+            deltas.append(item)
+            if new_watermark is None or value > new_watermark:
+                new_watermark, new_boundary_ids = value, set()
+            if value == new_watermark:
+                new_boundary_ids.add(item.get(id_field))
+
+        store.set(endpoint, new_watermark, new_boundary_ids)
+
+        return deltas
+
+    def request_page_(self, *args, **kwargs):
+        """Request a single page"""
         response = self.make_(*args, **kwargs)
         if response.status_code != 200:
             if response.content:
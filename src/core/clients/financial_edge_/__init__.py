@@ -2,22 +2,33 @@
 """
 Sky API SDK
 https://developer.sky.blackbaud.com/docs/services/
+
+Exports are resolved on first access so importing the package stays cheap; the
+HTTP stacks (requests, httpx) are only loaded when a client is actually used.
 """
-# API Client
-from clients.financial_edge_.entities.access_token import AccessToken
-from clients.financial_edge_.entities.accounts_payable import AccountsPayable
+import importlib
+
+_EXPORTS = {
+    # API Client
+    "SkyApi": "clients.financial_edge_.skyapiclient",
+    "SkyAPIClient": "clients.financial_edge_.skyapiclient",
+    "AsyncSkyApi": "clients.financial_edge_.async_skyapiclient",
+    "AsyncSkyAPIClient": "clients.financial_edge_.async_skyapiclient",
+    "SkyAPITokenManager": "clients.financial_edge_.token_manager",
+    # Entities
+    "AccessToken": "clients.financial_edge_.entities.access_token",
+    "AccountsPayable": "clients.financial_edge_.entities.accounts_payable",
+    # Journal Entry Batch
+    "GeneralLedger": "clients.financial_edge_.entities.general_ledger",
+}
+
+__all__ = list(_EXPORTS)
 
-# Journal Entry Batch
-from clients.financial_edge_.entities.general_ledger import GeneralLedger
-from clients.financial_edge_.skyapiclient import SkyAPIClient
 
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    globals()[name] = value
 
-class SkyApi(SkyAPIClient):
-    def __init__(self, *args, **kwargs):
-        """
-        Initialize the class with your access_key and subscription_key and attach all of your endpoints
-        """
-        super(SkyApi, self).__init__(*args, **kwargs)
-        self.general_ledger = GeneralLedger(self)
-        self.access_token = AccessToken(self)
-        self.accounts_payable = AccountsPayable(self)
+    return value
@@ -0,0 +1,259 @@
+# coding=utf-8
+"""
+Asynchronous Blackbaud SKY Api SDK, built on httpx. Mirrors the request surface of
+:class:`clients.financial_edge_.skyapiclient.SkyAPIClient` so one worker can keep
+hundreds of requests in flight.
+Documentation: https://developer.sky.blackbaud.com/docs/services/
+"""
+from __future__ import unicode_literals
+
+import asyncio
+import logging
+from urllib.parse import urljoin
+
+import httpx
+
+from clients.financial_edge_.baseapi import bounded_gather  # noqa: F401
+from clients.financial_edge_.entities.accounts_payable import AsyncAccountsPayable
+from clients.financial_edge_.entities.general_ledger import AsyncGeneralLedger
+from clients.financial_edge_.rate_limiter import (
+    RequestStats,
+    TokenBucketRateLimiter,
+    backoff_delay,
+    parse_retry_after,
+)
+from clients.financial_edge_.skyapiclient import (
+    IDEMPOTENT_METHODS,
+    IDEMPOTENT_RETRY_STATUSES,
+    SkyAPIError,
+    SkyAPITokenError,
+    _base_url,
+    _is_throttled,
+)
+
+_logger = logging.getLogger("SkyApiLogger")
+
+
+class AsyncSkyAPIClient(object):
+    """
+    Async Sky API class to communicate with the Blackbaud API
+    """
+
+    def __init__(
+        self,
+        subscription_key=None,
+        access_token=None,
+        token_manager=None,
+        timeout=None,
+        request_headers=None,
+        max_connections=100,
+        max_keepalive_connections=20,
+        http2=False,
+        rate_limit=None,
+        max_retries=5,
+        backoff_base=0.5,
+        backoff_max=60.0,
+    ):
+        """
+        :param token_manager: Shared, proactively refreshed token source. Takes precedence over `access_token`
+        :type token_manager: :py:data:`none` or
+            :class:`clients.financial_edge_.token_manager.SkyAPITokenManager`
+        :param max_connections: The per-client connection limit (all requests go to one host)
+        :type max_connections: :py:class:`int`
+        :param rate_limit: Requests per second, or a `TokenBucketRateLimiter` shared with other clients
+        """
+        super(AsyncSkyAPIClient, self).__init__()
+        if not (access_token or token_manager):
+            raise Exception("You must provide an OAuth access token")
+
+        self.base_url = _base_url("SKY_API_ENDPOINT")
+        self.subscription_key = subscription_key
+        self.access_token = access_token
+        self.token_manager = token_manager
+        self.request_headers = request_headers or {}
+        self.session = httpx.AsyncClient(
+            timeout=timeout,
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+        )
+        if isinstance(rate_limit, TokenBucketRateLimiter):
+            self.rate_limiter = rate_limit
+        else:
+            self.rate_limiter = TokenBucketRateLimiter(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff = (backoff_base, backoff_max)
+        self.stats = RequestStats()
+        self._token_lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        """
+        Close every pooled connection held by the client
+        """
+        await self.session.aclose()
+
+    @property
+    def counters(self):
+        return self.stats.snapshot()
+
+    async def _access_token(self, stale_token=None):
+        """
+        Return the current access token. Only one coroutine at a time may hit the
+        (blocking, file-locked) token manager; the rest reuse its result.
+        """
+        if not self.token_manager:
+            if stale_token:
+                raise SkyAPITokenError(
+                    "The access token was rejected and no token manager is configured."
+                )
+            return self.access_token
+
+        token = self.token_manager.cached_token()
+        if token and token != stale_token:
+            return token
+        async with self._token_lock:
+            token = self.token_manager.cached_token()
+            if token and token != stale_token:
+                return token
+            return await asyncio.to_thread(self.token_manager.refresh, stale_token)
+
+    async def _send(self, method, url, token, **kwargs):
+        headers = dict(self.request_headers)
+        headers["Authorization"] = f"Bearer {token}"
+        headers["Bb-Api-Subscription-Key"] = self.subscription_key
+        return await self.session.request(method, url, headers=headers, **kwargs)
+
+    async def _make_request(self, method, url, **kwargs):
+        """
+        Send a request with rate limiting, throttle-aware retries and a single
+        token refresh on 401
+        """
+        _logger.info("%s Request: %s", method, url)
+        idempotent = method in IDEMPOTENT_METHODS
+        token = await self._access_token()
+        refreshed = False
+        self.stats.incr("requests")
+
+        attempt = 0
+        while True:
+            if self.rate_limiter:
+                await self.rate_limiter.acquire_async()
+            try:
+                response = await self._send(method, url, token, **kwargs)
+            except httpx.TransportError:
+                if not idempotent or attempt >= self.max_retries:
+                    self.stats.incr("failed")
+                    raise
+                await asyncio.sleep(backoff_delay(attempt, *self.backoff))
+                attempt += 1
+                self.stats.incr("retried")
+                continue
+
+            if response.status_code == 401 and not refreshed:
+                token = await self._access_token(stale_token=token)
+                refreshed = True
+                continue
+
+            throttled = _is_throttled(response)
+            transient = idempotent and response.status_code in IDEMPOTENT_RETRY_STATUSES
+            if not (throttled or transient):
+                if self.rate_limiter:
+                    self.rate_limiter.on_success()
+                if response.status_code >= 400:
+                    self.stats.incr("failed")
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if throttled:
+                self.stats.incr("throttled")
+                if self.rate_limiter:
+                    self.rate_limiter.on_throttle(retry_after)
+            if attempt >= self.max_retries:
+                self.stats.incr("failed")
+                return response
+            delay = backoff_delay(attempt, *self.backoff)
+            await asyncio.sleep(max(delay, retry_after or 0))
+            attempt += 1
+            self.stats.incr("retried")
+
+    @staticmethod
+    def _handle_response(res):
+        if res.status_code == 401:
+            raise SkyAPITokenError(res.json())
+        if res.status_code >= 400:
+            # in case of a 500 error, the response might not be a JSON
+            try:
+                error_data = res.json()
+            except ValueError:
+                error_data = {"response": res}
+            raise SkyAPIError(error_data)
+        if res.status_code == 204:
+            return None
+        return res.json()
+
+    async def _get(self, url, **queryparams):
+        """
+        Handle authenticated GET requests
+        :param url: The url for the endpoint including path parameters
+        :type url: :py:class:`str`
+        :param queryparams: The query string parameters
+        :returns: The JSON output from the API
+        """
+        res = await self._make_request(
+            "GET", urljoin(self.base_url, url), params=queryparams or None
+        )
+        return self._handle_response(res)
+
+    async def _post(self, url, data=None):
+        """
+        Handle authenticated POST requests
+        :param url: The url for the endpoint including path parameters
+        :type url: :py:class:`str`
+        :param data: The request body parameters
+        :type data: :py:data:`none` or :py:class:`dict`
+        :returns: The JSON output from the API
+        """
+        res = await self._make_request("POST", urljoin(self.base_url, url), json=data)
+        return self._handle_response(res)
+
+    async def _patch(self, url, data=None):
+        """
+        Handle authenticated PATCH requests
+        :returns: The JSON output from the API
+        """
+        res = await self._make_request("PATCH", urljoin(self.base_url, url), json=data)
+        return self._handle_response(res)
+
+    async def _put(self, url, data=None):
+        """
+        Handle authenticated PUT requests
+        :returns: The JSON output from the API
+        """
+        res = await self._make_request("PUT", urljoin(self.base_url, url), json=data)
+        return self._handle_response(res)
+
+    async def _delete(self, url):
+        """
+        Handle authenticated DELETE requests
+        :returns: The JSON output from the API
+        """
+        res = await self._make_request("DELETE", urljoin(self.base_url, url))
+        return self._handle_response(res)
+
+
+class AsyncSkyApi(AsyncSkyAPIClient):
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the async client and attach the async endpoints
+        """
+        super(AsyncSkyApi, self).__init__(*args, **kwargs)
+        self.general_ledger = AsyncGeneralLedger(self)
+        self.accounts_payable = AsyncAccountsPayable(self)
@@ -3,11 +3,49 @@
 The base API object that allows constructions of various endpoint paths
 """
 from __future__ import unicode_literals
-from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
 
 # from skyapi.helpers import merge_results
 
 
+async def bounded_gather(aws, concurrency=100, return_exceptions=False):
+    """
+    Await every awaitable with at most `concurrency` of them running at once
+    :param aws: The coroutines to run
+    :param concurrency: The maximum number in flight
+    :type concurrency: :py:class:`int`
+    :param return_exceptions: Return exceptions in place of results instead of raising the first one
+    :type return_exceptions: :py:class:`bool`
+    :returns: The results in input order
+    """
+    import asyncio  # deferred: only async clients pay for it
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(aw):
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+def _next_page(url, queryparams, response, records):
+    """
+    Work out the request for the page after `response`
+    :returns: The (url, queryparams) of the next page or None
+    """
+    next_link = response.get('next_link')
+    if next_link:
+        return next_link, {}
+
+    limit = queryparams.get('limit')
+    if limit and len(records) >= limit:
+        return url, dict(queryparams, offset=queryparams.get('offset', 0) + len(records))
+
+    return None
+
+
 class BaseApi(object):
     """
     Simple class to buid path for entities
@@ -28,7 +66,9 @@ class BaseApi(object):
 
     def _build_path(self, *args):
         """
-        Build path with endpoint and args
+        Build path with endpoint and args. Entities set `entity`, `endpoint`, `version`
+        and `type` once in `__init__`, so the path only depends on the call arguments
+        and one instance can be shared between threads.
         :param args: Tokens in the endpoint URL
         :type args: :py:class:`unicode`
         """
@@ -39,3 +79,140 @@ class BaseApi(object):
             url = '/'.join(chain((self.entity, self.version, self.endpoint), map(str, args)))
 
         return url
+
+    def _map_concurrent(self, func, items, max_workers):
+        """
+        Apply `func` to every item over a thread pool
+        :param func: The call made for each item
+        :param items: The items to fan out
+        :type items: :py:class:`list`
+        :param max_workers: The number of concurrent calls. Keep it at or below the
+            client's `pool_maxsize` so every worker reuses a pooled connection
+        :type max_workers: :py:class:`int`
+        :returns: One result per item, in input order. A failed call yields its exception
+        """
+
+        def call(item):
+            try:
+                return func(item)
+            except Exception as exc:
+                return exc
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(call, items))
+
+    def _fetch_page(self, url, queryparams):
+        """
+        Fetch a single page and work out the request for the page after it
+        :param url: The url for the page
+        :type url: :py:class:`str`
+        :param queryparams: The query string parameters for the page
+        :type queryparams: :py:class:`dict`
+        :returns: The page records and the (url, queryparams) of the next page or None
+        """
+        response = self._sky_client._get(url, **queryparams) or {}
+        records = response.get('value', [])
+
+        return records, _next_page(url, queryparams, response, records)
+
+    def _paginate(self, url, limit=500, batch_size=None, prefetch=False, **queryparams):
+        """
+        Stream every record of a list endpoint, following `next_link` or offset paging
+        :param url: The url for the endpoint including path parameters
+        :type url: :py:class:`str`
+        :param limit: The number of records requested per page
+        :type limit: :py:class:`int`
+        :param batch_size: Yield lists of this many records instead of single records
+        :type batch_size: :py:data:`none` or :py:class:`int`
+        :param prefetch: Fetch the next page on a background thread while the current one is consumed
+        :type prefetch: :py:class:`bool`
+        :param queryparams: The query string parameters
+        """
+        records = self._iter_records(url, dict(queryparams, limit=limit), prefetch)
+        if not batch_size:
+            yield from records
+            return
+
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            yield batch
+
+    def _iter_records(self, url, queryparams, prefetch):
+        """
+        Yield records page by page, holding at most one page (two when prefetching) in memory
+        """
+        if not prefetch:
+            next_request = (url, queryparams)
+            while next_request:
+                records, next_request = self._fetch_page(*next_request)
+                yield from records
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._fetch_page, url, queryparams)
+            while future:
+                records, next_request = future.result()
+                future = executor.submit(self._fetch_page, *next_request) if next_request else None
+                yield from records
+
+    async def _fetch_page_async(self, url, queryparams):
+        """
+        Async counterpart of `_fetch_page`, for clients whose `_get` is a coroutine
+        """
+        response = await self._sky_client._get(url, **queryparams) or {}
+        records = response.get('value', [])
+
+        return records, _next_page(url, queryparams, response, records)
+
+    async def _paginate_async(self, url, limit=500, batch_size=None, prefetch=False, **queryparams):
+        """
+        Async counterpart of `_paginate`. With `prefetch`, the next page is requested
+        as a task while the current one is consumed.
+        """
+        import asyncio  # deferred: only async clients pay for it
+
+        batch = []
+        next_request = (url, dict(queryparams, limit=limit))
+        task = None
+        try:
+            while next_request or task:
+                if task:
+                    records, next_request = await task
+                    task = None
+                else:
+                    records, next_request = await self._fetch_page_async(*next_request)
+                if prefetch and next_request:
+                    task = asyncio.ensure_future(self._fetch_page_async(*next_request))
+                    next_request = None
+
+                for record in records:
+                    if not batch_size:
+                        yield record
+                        continue
+                    batch.append(record)
+                    if len(batch) == batch_size:
+                        yield batch
+                        batch = []
+
+            if batch:
+                yield batch
+        finally:
+            # the consumer stopped early: drop the prefetched page instead of leaving
+            # the task to fail against a closed client
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+    async def _map_concurrent_async(self, func, items, concurrency):
+        """
+        Async counterpart of `_map_concurrent`
+        :returns: One result per item, in input order. A failed call yields its exception
+        """
+        return await bounded_gather(
+            (func(item) for item in items), concurrency=concurrency, return_exceptions=True
+        )
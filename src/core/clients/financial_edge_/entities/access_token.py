@@ -18,23 +18,17 @@ class AccessToken(BaseApi):
         application_secret,
         environment_id,
     ):
-        self.subscription_key = subscription_key
-        self.refresh_token = refresh_token
-        self.redirect_uri = redirect_uri
-        self.application_id = application_id
-        self.application_secret = application_secret
-        self.environment_id = environment_id
-        self.data = {
+        data = {
             "grant_type": self.type,
-            "refresh_token": self.refresh_token,
-            "redirect_uri": self.redirect_uri,
-            "client_id": self.application_id,
-            "client_secret": self.application_secret,
-            "environment_id": self.environment_id,
+            "refresh_token": refresh_token,
+            "redirect_uri": redirect_uri,
+            "client_id": application_id,
+            "client_secret": application_secret,
+            "environment_id": environment_id,
             "preserve_refresh_token": "true",
         }
 
         return self._sky_client._get_refresh_token(
             url=self._build_path(self.endpoint, self.type),
-            data=urllib.parse.urlencode(self.data),
+            data=urllib.parse.urlencode(data),
         )
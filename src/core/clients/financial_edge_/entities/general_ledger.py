@@ -10,24 +10,54 @@ class GeneralLedger(BaseApi):
 
     def __init__(self, *args, **kwargs):
         super(GeneralLedger, self).__init__(*args, **kwargs)
-        self.entity = ""
-        self.type = ""
+        self.entity = "generalledger"
 
     # POST FUNCTIONS
     def post_(self, *args, data=None):
-        self.entity = "generalledger"
-        self.type = "post"
-
         return self._sky_client._post(url=self._build_path(*args), data=data)
 
-    def patch_(self, *args, data=None):
-        self.entity = "generalledger"
-        self.type = "patch"
+    def post_many(self, records, *args, max_workers=8):
+        """Post each record concurrently and return the results in input order"""
+        return self._map_concurrent(
+            lambda record: self.post_(*args, data=record), records, max_workers
+        )
 
+    def patch_(self, *args, data=None):
         return self._sky_client._patch(url=self._build_path(*args), data=data)
 
     # GET FUNCTIONS
     def get_(self, *args, **kwargs):
-        self.entity = "generalledger"
-        self.type = "get"
         return self._sky_client._get(url=self._build_path(*args), **kwargs)
+
+    def iter_(self, *args, limit=500, batch_size=None, prefetch=False, **kwargs):
+        """Stream every record of a list endpoint instead of a single page"""
+        return self._paginate(
+            self._build_path(*args),
+            limit=limit,
+            batch_size=batch_size,
+            prefetch=prefetch,
+            **kwargs,
+        )
+
+
+class AsyncGeneralLedger(GeneralLedger):
+    """
+    GeneralLedger bound to an `AsyncSkyAPIClient`. `get_`, `post_` and `patch_` return
+    coroutines from the async client unchanged.
+    """
+
+    async def post_many(self, records, *args, concurrency=50):
+        """Post each record concurrently and return the results in input order"""
+        return await self._map_concurrent_async(
+            lambda record: self.post_(*args, data=record), records, concurrency
+        )
+
+    def iter_(self, *args, limit=500, batch_size=None, prefetch=False, **kwargs):
+        """Async-iterate every record of a list endpoint"""
+        return self._paginate_async(
+            self._build_path(*args),
+            limit=limit,
+            batch_size=batch_size,
+            prefetch=prefetch,
+            **kwargs,
+        )
@@ -0,0 +1,165 @@
+# coding=utf-8
+"""
+Client-side throttling for the SKY API. A token bucket paces outgoing requests,
+halves its rate when the API throttles us, creeps back up on success, and pauses
+every caller for the duration of a `Retry-After` header.
+"""
+from __future__ import unicode_literals
+
+import email.utils
+import random
+import threading
+import time
+from collections import Counter
+
+
+def parse_retry_after(value):
+    """
+    Parse a `Retry-After` header given as seconds or as an HTTP date
+    :param value: The header value
+    :type value: :py:data:`none` or :py:class:`str`
+    :returns: The number of seconds to wait, or None
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def backoff_delay(attempt, base=0.5, cap=60.0):
+    """
+    Full-jitter exponential backoff
+    :param attempt: The retry number, starting at 0
+    :type attempt: :py:class:`int`
+    """
+    return random.uniform(0, min(cap, base * 2**attempt))
+
+
+class TokenBucketRateLimiter(object):
+    """
+    Thread-safe token bucket with an adaptive (AIMD) rate
+    """
+
+    def __init__(self, rate, burst=None, min_rate=0.5, increase=0.5):
+        """
+        :param rate: The maximum number of requests per second
+        :type rate: :py:class:`float`
+        :param burst: The bucket capacity. Defaults to one second worth of requests
+        :type burst: :py:data:`none` or :py:class:`int`
+        :param min_rate: The floor the rate is never lowered below
+        :type min_rate: :py:class:`float`
+        :param increase: Requests per second added back after every successful call
+        :type increase: :py:class:`float`
+        """
+        super(TokenBucketRateLimiter, self).__init__()
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min_rate
+        self.increase = increase
+        self.capacity = float(burst or max(1, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def _try_acquire(self):
+        """
+        Take a token if one is available
+        :returns: 0 when a token was taken, otherwise the seconds to wait before trying again
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """
+        Block until a request may be sent
+        """
+        wait = self._try_acquire()
+        while wait:
+            time.sleep(wait)
+            wait = self._try_acquire()
+
+    async def acquire_async(self):
+        """
+        Wait, without blocking the event loop, until a request may be sent
+        """
+        import asyncio  # deferred: only async clients pay for it
+
+        wait = self._try_acquire()
+        while wait:
+            await asyncio.sleep(wait)
+            wait = self._try_acquire()
+
+    def set_rate(self, rate):
+        """
+        Change the maximum rate, e.g. after the subscription quota changes
+        """
+        with self._lock:
+            self._refill(time.monotonic())
+            self.max_rate = float(rate)
+            self.rate = min(self.rate, self.max_rate)
+
+    def on_success(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Halve the rate and, when the API says how long to back off, pause every caller
+        :param retry_after: Seconds from a `Retry-After` header
+        :type retry_after: :py:data:`none` or :py:class:`float`
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0.0)
+            if retry_after:
+                self._paused_until = max(self._paused_until, now + retry_after)
+
+
+class RequestStats(object):
+    """
+    Thread-safe request counters
+    """
+
+    def __init__(self):
+        super(RequestStats, self).__init__()
+        self._counts = Counter()
+        self._lock = threading.Lock()
+
+    def incr(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        """
+        :returns: A dict of `requests`, `throttled`, `retried` and `failed` counts
+        """
+        with self._lock:
+            return {
+                name: self._counts[name]
+                for name in ("requests", "throttled", "retried", "failed")
+            }
@@ -8,11 +8,21 @@ from __future__ import unicode_literals
 import functools
 import logging
 import os
+import time
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from clients.financial_edge_.entities.access_token import AccessToken
+from clients.financial_edge_.entities.accounts_payable import AccountsPayable
+from clients.financial_edge_.entities.general_ledger import GeneralLedger
+from clients.financial_edge_.rate_limiter import (
+    RequestStats,
+    TokenBucketRateLimiter,
+    backoff_delay,
+    parse_retry_after,
+)
 
-SKY_API_ENDPOINT = os.environ["SKY_API_ENDPOINT"]
-SKY_API_OAUTH_ENDPOINT = os.environ["SKY_API_OAUTH_ENDPOINT"]
 
 # Handle library reorganisation Python 2 > Python 3.
 try:
@@ -22,13 +32,18 @@ except ImportError:
 
     from urlparse import urljoin
 
+# Create a logger object. Handlers and levels are left to the application.
+_logger = logging.getLogger("SkyApiLogger")
 
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+# Responses that are retried for every method, and for idempotent methods only
+THROTTLE_STATUSES = (429,)
+IDEMPOTENT_RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "PUT", "DELETE")
 
-# Create a logger object
-_logger = logging.getLogger("SkyApiLogger")
+# Payload logging modes, only applied when DEBUG is enabled on the logger
+LOG_NONE = "none"
+LOG_TRUNCATED = "truncated"
+LOG_FULL = "full"
 
 
 def _enabled_or_noop(fn):
@@ -52,6 +67,40 @@ class SkyAPITokenError(Exception):
     pass
 
 
+def _sent_token(response):
+    """
+    The access token a response was requested with. Another thread may have refreshed
+    the client's token since, so this, not the current token, is the one to replace.
+    """
+    request = getattr(response, "request", None)
+    authorization = request.headers.get("Authorization", "") if request is not None else ""
+    if authorization.startswith("Bearer "):
+        return authorization[len("Bearer "):]
+    return None
+
+
+def request_stats_handler(func):
+    """
+    Decorator to count each call's outcome once, outside the auth and retry layers, so
+    a 401 cured by a token refresh or a retried 429 is not reported as a failure.
+    """
+
+    @functools.wraps(func)
+    def wrapper(sky_client, *args, **kwargs):
+        stats = sky_client.stats
+        stats.incr("requests")
+        try:
+            response = func(sky_client, *args, **kwargs)
+        except Exception:
+            stats.incr("failed")
+            raise
+        if response.status_code >= 400:
+            stats.incr("failed")
+        return response
+
+    return wrapper
+
+
 def authentication_handler(func):
     """Decorator to handle authentication errors and refresh tokens."""
 
@@ -59,20 +108,17 @@ def authentication_handler(func):
     def wrapper(sky_client, *args, **kwargs):
         try:
             response = func(sky_client, *args, **kwargs)
-            if response.status_code in [401, 403]:
+            if response.status_code in [401, 403] and not _is_throttled(response):
                 print("Access token expired. Refreshing token...")
-                new_access_token = sky_client._refresh_access_token().get(
-                    "access_token"
-                )
+                new_access_token = sky_client._refresh_access_token(
+                    stale_token=_sent_token(response)
+                ).get("access_token")
                 if new_access_token:
-                    if "headers" in kwargs:
-                        kwargs["headers"][
-                            "Authorization"
-                        ] = f"Bearer {new_access_token}"
-                    else:
-                        kwargs["headers"] = {
-                            "Authorization": f"Bearer {new_access_token}"
-                        }
+                    # copy so the client's shared request_headers are never mutated
+                    kwargs["headers"] = dict(
+                        kwargs.get("headers") or {},
+                        Authorization=f"Bearer {new_access_token}",
+                    )
 
                     return func(sky_client, *args, **kwargs)
                 else:
@@ -87,6 +133,104 @@ def authentication_handler(func):
     return wrapper
 
 
+def _build_session(pool_connections, pool_maxsize, pool_block, keep_alive):
+    """
+    Build a pooled requests session shared by every call made through a client
+    :param pool_connections: The number of host pools to cache
+    :type pool_connections: :py:class:`int`
+    :param pool_maxsize: The maximum number of connections kept per host
+    :type pool_maxsize: :py:class:`int`
+    :param pool_block: Block when the pool is exhausted instead of opening extra connections
+    :type pool_block: :py:class:`bool`
+    :param keep_alive: Keep sockets open between requests
+    :type keep_alive: :py:class:`bool`
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if not keep_alive:
+        session.headers["Connection"] = "close"
+
+    return session
+
+
+def _base_url(request_type):
+    """
+    Resolve the base url for `request_type` ("SKY_API_ENDPOINT" or "SKY_API_OAUTH_ENDPOINT")
+    from the environment variable of the same name. Read when a client is built, not
+    at import, so importing the SDK never requires the configuration.
+    """
+    try:
+        return os.environ[request_type]
+    except KeyError:
+        raise SkyAPIError(
+            f"The {request_type} environment variable must be set to use the SKY API."
+        ) from None
+
+
+def _is_throttled(response):
+    """A 429, or a 403 quota rejection (which carries Retry-After)"""
+    return response.status_code in THROTTLE_STATUSES or (
+        response.status_code == 403 and "Retry-After" in response.headers
+    )
+
+
+def rate_limit_handler(func):
+    """Decorator to pace requests and retry throttled or transient failures."""
+
+    @functools.wraps(func)
+    def wrapper(sky_client, *args, **kwargs):
+        limiter = sky_client.rate_limiter
+        stats = sky_client.stats
+        idempotent = kwargs.get("method") in IDEMPOTENT_METHODS
+
+        for attempt in range(sky_client.max_retries + 1):
+            if attempt:
+                stats.incr("retried")
+            if limiter:
+                limiter.acquire()
+
+            try:
+                response = func(sky_client, *args, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not idempotent or attempt == sky_client.max_retries:
+                    raise
+                time.sleep(backoff_delay(attempt, *sky_client.backoff))
+                continue
+
+            throttled = _is_throttled(response)
+            transient = idempotent and response.status_code in IDEMPOTENT_RETRY_STATUSES
+            if not (throttled or transient):
+                if limiter:
+                    limiter.on_success()
+                return response
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if throttled:
+                stats.incr("throttled")
+                if limiter:
+                    limiter.on_throttle(retry_after)
+            if attempt < sky_client.max_retries:
+                _logger.info(
+                    "%s %s returned %s, retrying (attempt %s)",
+                    kwargs.get("method"),
+                    kwargs.get("url"),
+                    response.status_code,
+                    attempt + 1,
+                )
+                delay = backoff_delay(attempt, *sky_client.backoff)
+                time.sleep(max(delay, retry_after or 0))
+
+        return response
+
+    return wrapper
+
+
 class SkyAPIClient(object):
     """
     Sky API class to communicate with the Blackbaud API
@@ -101,40 +245,130 @@ class SkyAPIClient(object):
         timeout=None,
         request_hooks=None,
         request_headers=None,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        keep_alive=True,
+        token_manager=None,
+        log_mode=LOG_TRUNCATED,
+        log_max_chars=1024,
+        rate_limit=None,
+        max_retries=5,
+        backoff_base=0.5,
+        backoff_max=60.0,
     ):
         super(SkyAPIClient, self).__init__()
         self.enabled = enabled
         self.timeout = timeout
-        if access_token and request_type == "SKY_API_ENDPOINT":
-            self.auth = SkyAPIOAuth(access_token, subscription_key, request_type)
-            self.base_url = SKY_API_ENDPOINT
+        if log_mode not in (LOG_NONE, LOG_TRUNCATED, LOG_FULL):
+            raise ValueError(f"Unknown log_mode: {log_mode}")
+        self.log_mode = log_mode
+        self.log_max_chars = log_max_chars
+        self.session = _build_session(
+            pool_connections, pool_maxsize, pool_block, keep_alive
+        )
+        # requests per second, or a TokenBucketRateLimiter shared between clients
+        if isinstance(rate_limit, TokenBucketRateLimiter):
+            self.rate_limiter = rate_limit
+        else:
+            self.rate_limiter = TokenBucketRateLimiter(rate_limit) if rate_limit else None
+        self.max_retries = max_retries
+        self.backoff = (backoff_base, backoff_max)
+        self.stats = RequestStats()
+        self.token_manager = token_manager
+        if (access_token or token_manager) and request_type == "SKY_API_ENDPOINT":
+            self.auth = SkyAPIOAuth(
+                access_token, subscription_key, request_type, token_manager
+            )
+            self.base_url = _base_url(request_type)
 
         elif request_type == "SKY_API_OAUTH_ENDPOINT":
             self.auth = SkyAPIOAuth(access_token, subscription_key, request_type)
-            self.base_url = SKY_API_OAUTH_ENDPOINT
+            self.base_url = _base_url(request_type)
         else:
             raise Exception("You must provide an OAuth access token")
 
         self.request_headers = request_headers or requests.utils.default_headers()
         self.request_hooks = request_hooks or requests.hooks.default_hooks()
 
-    @authentication_handler
-    def _make_request(self, **kwargs):
-        _logger.info("{method} Request: {url}".format(**kwargs))
+    def __enter__(self):
+        return self
 
-        if kwargs.get("data"):
-            _logger.debug("PAYLOAD: {data}".format(**kwargs))
-        elif kwargs.get("json"):
-            _logger.debug("PAYLOAD: {json}".format(**kwargs))
+    def __exit__(self, *exc_info):
+        self.close()
 
-        response = requests.request(**kwargs)
+    def close(self):
+        """
+        Close every pooled connection held by the client session
+        """
+        self.session.close()
 
-        _logger.debug(
-            "{method} Response: {status} {text}".format(
-                method=kwargs["method"], status=response.status_code, text=response.text
+    def _refresh_access_token(self, stale_token=None):
+        """
+        Refresh the access token after the API rejected it. With a token manager the
+        refresh is shared with every other client and process using the same cache.
+        :param stale_token: The token the rejected request was sent with. When another
+            thread has already replaced it, its new token is returned without a refresh
+        :type stale_token: :py:data:`none` or :py:class:`str`
+        :returns: A dict holding the new `access_token`
+        """
+        if not self.token_manager:
+            raise SkyAPITokenError(
+                "The access token was rejected and no token manager is configured."
             )
+        access_token = self.token_manager.refresh(
+            stale_token=stale_token or self.auth.access_token
         )
 
+        return {"access_token": access_token}
+
+    def _log_body(self, body):
+        """
+        Render a request or response body for the debug log according to `log_mode`
+        :param body: The payload, or the raw response content
+        :type body: :py:class:`bytes`, :py:class:`str` or :py:class:`dict`
+        """
+        truncate = self.log_mode == LOG_TRUNCATED
+        if isinstance(body, bytes):
+            # only decode the bytes that will be kept
+            body = body[: self.log_max_chars + 1] if truncate else body
+            text = body.decode("utf-8", errors="replace")
+        else:
+            text = body if isinstance(body, str) else str(body)
+        if truncate and len(text) > self.log_max_chars:
+            text = text[: self.log_max_chars] + "..."
+
+        return text
+
+    @property
+    def counters(self):
+        """
+        :returns: The number of requests, throttled responses, retries and failures so far
+        """
+        return self.stats.snapshot()
+
+    @request_stats_handler
+    @authentication_handler
+    @rate_limit_handler
+    def _make_request(self, **kwargs):
+        _logger.info("%s Request: %s", kwargs["method"], kwargs["url"])
+
+        # bodies are only rendered when they will actually be emitted
+        log_bodies = self.log_mode != LOG_NONE and _logger.isEnabledFor(logging.DEBUG)
+        payload = kwargs.get("data") or kwargs.get("json")
+        if log_bodies and payload:
+            _logger.debug("PAYLOAD: %s", self._log_body(payload))
+
+        response = self.session.request(**kwargs)
+
+        if log_bodies:
+            _logger.debug(
+                "%s Response: %s %s",
+                kwargs["method"],
+                response.status_code,
+                self._log_body(response.content),
+            )
+
         return response
 
     @_enabled_or_noop
@@ -405,17 +639,27 @@ class SkyAPIOAuth(requests.auth.AuthBase):
     https://developer.blackbaud.com/skyapi/docs/authorization/auth-code-flow
     """
 
-    def __init__(self, access_token, subscription_key, request_type):
+    def __init__(self, access_token, subscription_key, request_type, token_manager=None):
         """
         Initialize the OAuth and save the access token
         :param access_token: The access token provided by OAuth authentication
         :type access_token: :py:class:`str`
         :param subscription_key: The Blackbaud API Subscription key for your application
         :type subscription_key: :py:class:`str`
+        :param token_manager: Serves (and proactively refreshes) the access token when set
+        :type token_manager: :py:data:`none` or
+            :class:`clients.financial_edge_.token_manager.SkyAPITokenManager`
         """
         self._access_token = access_token
         self._subscription_key = subscription_key
         self._request_type = request_type
+        self._token_manager = token_manager
+
+    @property
+    def access_token(self):
+        if self._token_manager:
+            return self._token_manager.get_token()
+        return self._access_token
 
     def __call__(self, r):
         """
@@ -424,8 +668,19 @@ class SkyAPIOAuth(requests.auth.AuthBase):
 
         if self._request_type == "SKY_API_ENDPOINT":
             r.headers["Bb-Api-Subscription-Key"] = self._subscription_key
-            r.headers["Authorization"] = "Bearer " + self._access_token
+            r.headers["Authorization"] = "Bearer " + self.access_token
             return r
         elif self._request_type == "SKY_API_OAUTH_ENDPOINT":
             r.headers["Content-Type"]: "application/x-www-form-urlencoded"
             return r
+
+
+class SkyApi(SkyAPIClient):
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the class with your access_key and subscription_key and attach all of your endpoints
+        """
+        super(SkyApi, self).__init__(*args, **kwargs)
+        self.general_ledger = GeneralLedger(self)
+        self.access_token = AccessToken(self)
+        self.accounts_payable = AccountsPayable(self)
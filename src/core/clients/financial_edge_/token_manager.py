@@ -0,0 +1,167 @@
+# coding=utf-8
+"""
+Host-wide OAuth token cache for the SKY API. The access token and its expiry are
+persisted to a JSON file shared by every process on the host, and refreshed just
+before expiry under a file lock so a fleet of workers refreshes once per window.
+"""
+from __future__ import unicode_literals
+
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from clients.financial_edge_.entities.access_token import AccessToken
+from clients.financial_edge_.skyapiclient import SkyAPIClient, SkyAPITokenError
+
+
+@contextlib.contextmanager
+def _file_lock(path):
+    """
+    Hold an exclusive lock on `path` for the duration of the block
+    :param path: The lock file path
+    :type path: :py:class:`str`
+    """
+    with open(path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class SkyAPITokenManager(object):
+    """
+    Serve SKY API access tokens from a cache shared across processes and refresh
+    them proactively, `refresh_margin` seconds before they expire
+    """
+
+    def __init__(
+        self,
+        application_id,
+        application_secret,
+        refresh_token,
+        redirect_uri=None,
+        environment_id=None,
+        subscription_key=None,
+        cache_path=None,
+        refresh_margin=300,
+    ):
+        """
+        :param application_id: The SKY application (client) id
+        :type application_id: :py:class:`str`
+        :param application_secret: The SKY application secret
+        :type application_secret: :py:class:`str`
+        :param refresh_token: The refresh token used when the cache holds none
+        :type refresh_token: :py:class:`str`
+        :param cache_path: The token file. Defaults to one file per application in the temp directory
+        :type cache_path: :py:data:`none` or :py:class:`str`
+        :param refresh_margin: Seconds before expiry at which the token is refreshed
+        :type refresh_margin: :py:class:`int`
+        """
+        super(SkyAPITokenManager, self).__init__()
+        self.application_id = application_id
+        self.application_secret = application_secret
+        self.redirect_uri = redirect_uri
+        self.environment_id = environment_id
+        self.subscription_key = subscription_key
+        self.refresh_margin = refresh_margin
+        self.cache_path = cache_path or os.path.join(
+            tempfile.gettempdir(), "skyapi_token_{}.json".format(application_id)
+        )
+        self._lock_path = self.cache_path + ".lock"
+        self._thread_lock = threading.Lock()
+        self._refresh_token = refresh_token
+        self._token = None
+
+    def _is_fresh(self, token):
+        return bool(token) and token["expires_at"] - self.refresh_margin > time.time()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, token):
+        directory = os.path.dirname(self.cache_path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(token, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def _request_token(self, refresh_token):
+        """
+        Exchange the refresh token for a new access token
+        """
+        oauth_client = SkyAPIClient(request_type="SKY_API_OAUTH_ENDPOINT")
+        with oauth_client:
+            response = AccessToken(oauth_client).get_refresh_token(
+                subscription_key=self.subscription_key,
+                refresh_token=refresh_token,
+                redirect_uri=self.redirect_uri,
+                application_id=self.application_id,
+                application_secret=self.application_secret,
+                environment_id=self.environment_id,
+            )
+        if not response or not response.get("access_token"):
+            raise SkyAPITokenError("Failed to refresh the access token.")
+
+        return {
+            "access_token": response["access_token"],
+            "refresh_token": response.get("refresh_token") or refresh_token,
+            "expires_at": time.time() + int(response.get("expires_in", 3600)),
+        }
+
+    def cached_token(self):
+        """
+        Return the in-memory access token if it is still fresh, without touching disk
+        :returns: The access token or None
+        """
+        token = self._token
+        return token["access_token"] if self._is_fresh(token) else None
+
+    def get_token(self):
+        """
+        Return a valid access token, refreshing it if it is about to expire
+        :returns: The access token
+        """
+        return self.cached_token() or self.refresh()
+
+    def refresh(self, stale_token=None):
+        """
+        Refresh the access token unless another thread or process already did
+        :param stale_token: The token the caller saw rejected, if any. A cached token that
+            differs from it is reused instead of refreshing again
+        :type stale_token: :py:data:`none` or :py:class:`str`
+        :returns: The access token
+        """
+        with self._thread_lock, _file_lock(self._lock_path):
+            token = self._read_cache()
+            if self._is_fresh(token) and token["access_token"] != stale_token:
+                self._token = token
+                return token["access_token"]
+
+            refresh_token = (token or {}).get("refresh_token") or self._refresh_token
+            token = self._request_token(refresh_token)
+            self._write_cache(token)
+            self._token = token
+
+            return token["access_token"]
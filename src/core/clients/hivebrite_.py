@@ -1,11 +1,21 @@
-import json
+import math
+import mimetypes
 import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
 
 load_dotenv()
 
+_LINK_PAGE = re.compile(r'<[^>]*[?&]page=(\d+)[^>]*>;\s*rel="(\w+)"')
+
 
 def must_open_(_f_):
     """summary"""
@@ -16,26 +26,217 @@ def must_open_(_f_):
         raise _e_
 
 
+class MultipartStream:
+    """A multipart/form-data body that reads its files while it is being sent.
+
+    requests builds multipart bodies fully in memory; this yields the form fields
+    and then each file in chunks, with a known Content-Length, so an upload is
+    never held in memory. Fields and files take the same shapes as requests'
+    `data` and `files`: lists repeat a field, and a file is a file object or a
+    (filename, fileobj[, content_type]) tuple.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(self, data=None, files=None):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f"multipart/form-data; boundary={self.boundary}"
+        self._parts = []
+
+        for name, values in (data or {}).items():
+            if not isinstance(values, (list, tuple)):
+                values = [values]
+            for value in values:
+                if not isinstance(value, bytes):
+                    value = str(value).encode("utf-8")
+                self._parts.append(self._part_header(name) + value + b"\r\n")
+
+        for name, value in (files or {}).items():
+            if isinstance(value, tuple):
+                filename, fileobj = value[0], value[1]
+                content_type = value[2] if len(value) > 2 else None
+            else:
+                fileobj = value
+                filename = os.path.basename(getattr(fileobj, "name", name))
+                content_type = None
+            content_type = (
+                content_type
+                or mimetypes.guess_type(filename)[0]
+                or "application/octet-stream"
+            )
+            start = fileobj.tell()
+            size = fileobj.seek(0, os.SEEK_END) - start
+            self._parts.append(self._part_header(name, filename, content_type))
+            self._parts.append((fileobj, start, size))
+            self._parts.append(b"\r\n")
+
+        self._parts.append(f"--{self.boundary}--\r\n".encode())
+        self.len = sum(
+            len(part) if isinstance(part, bytes) else part[2] for part in self._parts
+        )
+        self.rewind()
+
+    def _part_header(self, name, filename=None, content_type=None):
+        disposition = f'form-data; name="{name}"'
+        if filename is not None:
+            disposition += f'; filename="{filename}"'
+        header = f"--{self.boundary}\r\nContent-Disposition: {disposition}\r\n"
+        if content_type:
+            header += f"Content-Type: {content_type}\r\n"
+        return (header + "\r\n").encode("utf-8")
+
+    def _iter_chunks(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            fileobj, start, size = part
+            fileobj.seek(start)
+            while size > 0:
+                chunk = fileobj.read(min(self.chunk_size, size))
+                if not chunk:
+                    break
+                size -= len(chunk)
+                yield chunk
+
+    def rewind(self):
+        """Start the body over, e.g. to send it again after a 401"""
+        self._chunks = self._iter_chunks()
+        self._buffer = bytearray()
+
+    def __len__(self):
+        return self.len
+
+    def __iter__(self):
+        while True:
+            chunk = self.read(self.chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self, size=-1):
+        while size < 0 or len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        if size < 0:
+            size = len(self._buffer)
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+
 class HivebriteClient:
     """_summary_"""
 
+    # Tokens fetched by any instance, keyed by (root, client_id), so every client in the
+    # process reuses one token until it expires and concurrent callers share one refresh.
+    _token_lock = threading.Lock()
+    _shared_tokens = {}
+    # refresh this many seconds before the token expires
+    token_margin = 60
+    # one pooled session per root, shared by every instance in the process
+    _session_lock = threading.Lock()
+    _sessions = {}
+    pool_maxsize = 10
+
     def __init__(self):
         if os.getenv("ENV") == "DEV":
             self.admin_user = os.getenv("SANDBOX_HIVEBRITE_ADMIN_USER")
             self.admin_pw = os.getenv("SANDBOX_HIVEBRITE_ADMIN_PW")
             self.root = os.getenv("SANDBOX_HIVEBRITE_URL")
-            self.auth = self.new_oauth(
-                os.getenv("SANDBOX_HIVEBRITE_CLIENT_ID"),
-                os.getenv("SANDBOX_HIVEBRITE_CLIENT_SECRET"),
-            )
+            self.client_id = os.getenv("SANDBOX_HIVEBRITE_CLIENT_ID")
+            self.client_secret = os.getenv("SANDBOX_HIVEBRITE_CLIENT_SECRET")
+            self.auth = self.token()
         elif os.getenv("ENV") == "LIVE":
             self.admin_user = os.getenv("HIVEBRITE_ADMIN_USER")
             self.admin_pw = os.getenv("HIVEBRITE_ADMIN_PW")
             self.root = os.getenv("HIVEBRITE_URL")
-            self.auth = self.new_oauth(
-                os.getenv("HIVEBRITE_CLIENT_ID"), os.getenv("HIVEBRITE_CLIENT_SECRET")
+            self.client_id = os.getenv("HIVEBRITE_CLIENT_ID")
+            self.client_secret = os.getenv("HIVEBRITE_CLIENT_SECRET")
+            self.auth = self.token()
+
+    @property
+    def session(self):
+        """The pooled requests.Session shared by every client of this root"""
+        session = HivebriteClient._sessions.get(self.root)
+        if session is None:
+            with HivebriteClient._session_lock:
+                session = HivebriteClient._sessions.get(self.root)
+                if session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_maxsize)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    HivebriteClient._sessions[self.root] = session
+        return session
+
+    def _is_fresh(self, token_data):
+        return token_data["expires_at"] - self.token_margin > time.time()
+
+    def token(self, stale_token=None):
+        """Returns a valid token, shared by every client of the same root and client_id.
+
+        A cached token is reused until shortly before it expires. It is then renewed
+        with its refresh token, falling back to the password grant. Callers that
+        race on an expired token wait for a single refresh.
+
+        Args:
+            stale_token (str, optional): An access token the API rejected; it is
+                replaced even if it has not expired yet.
+        """
+        key = (self.root, self.client_id)
+        with HivebriteClient._token_lock:
+            shared = HivebriteClient._shared_tokens.get(key)
+            if (
+                shared
+                and self._is_fresh(shared)
+                and shared["access_token"] != stale_token
+            ):
+                return shared
+
+            token_data = None
+            if shared and shared.get("refresh_token"):
+                try:
+                    token_data = self.refresh_oauth(
+                        self.client_id, self.client_secret, shared["refresh_token"]
+                    )
+                except requests.exceptions.RequestException as exc:
+                    print(f"Hivebrite token refresh failed, logging in again: {exc}")
+            if token_data is None:
+                token_data = self.new_oauth(self.client_id, self.client_secret)
+
+            token_data["expires_at"] = time.time() + token_data.get("expires_in", 7200)
+            HivebriteClient._shared_tokens[key] = token_data
+
+            return token_data
+
+    def _auth_headers(self):
+        if not self._is_fresh(self.auth):
+            self.auth = self.token()
+        return {"Authorization": f"Bearer {self.auth['access_token']}"}
+
+    @staticmethod
+    def _sent_token(auth_headers):
+        return auth_headers["Authorization"][len("Bearer "):]
+
+    def _authorized_request(self, request, url, headers=None, **kwargs):
+        """Make the request, renewing the token and retrying once when it is rejected"""
+        kwargs.setdefault("timeout", 2000)
+        headers = headers or {}
+        auth_headers = self._auth_headers()
+        response = self.make_request(request, url, headers={**headers, **auth_headers}, **kwargs)
+        if response[0] == "error" and response[1].startswith("401"):
+            self.auth = self.token(stale_token=self._sent_token(auth_headers))
+            if isinstance(kwargs.get("data"), MultipartStream):
+                kwargs["data"].rewind()
+            response = self.make_request(
+                request, url, headers={**headers, **self._auth_headers()}, **kwargs
             )
 
+        return response
+
     def make_request(self, request, *args, **kwargs):
         """Makes the request
         Args:
@@ -49,7 +250,7 @@ class HivebriteClient:
 
             req.raise_for_status()
             if req.status_code in [200, 201]:
-                res = json.loads(req.content.decode("utf-8"))
+                res = req.json()
                 response = ("success", res)
         except requests.exceptions.HTTPError as exc:
             if exc.response.status_code == 404:
@@ -72,7 +273,7 @@ class HivebriteClient:
             "password": self.admin_pw,
         }
         headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        response = requests.post(
+        response = self.session.post(
             f"{self.root}/api/oauth/token", data=data, headers=headers, timeout=2000
         )
         response.raise_for_status()
@@ -81,23 +282,112 @@ class HivebriteClient:
 
         return token_data
 
+    def refresh_oauth(self, client_id, client_secret, refresh_token):
+        """HIVEBRITE TOKEN from a refresh token"""
+        data = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "grant_type": "refresh_token",
+            "refresh_token": refresh_token,
+        }
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        response = self.session.post(
+            f"{self.root}/api/oauth/token", data=data, headers=headers, timeout=2000
+        )
+        response.raise_for_status()
+
+        return response.json()
+
     def get_(self, endpoint):
         """standard get request"""
-        return self.make_request(
-            requests.get,
-            f"{self.root}{endpoint}",
-            headers={"Authorization": f"Bearer {self.auth['access_token']}"},
-            timeout=2000,
-        )
+        return self._authorized_request(self.session.get, f"{self.root}{endpoint}")
 
     def post_(self, endpoint, data=None, files=None):
-        """standard get request"""
+        """standard post request; with files, the multipart body is streamed from them"""
+        if files:
+            body = MultipartStream(data, files)
+            return self._authorized_request(
+                self.session.post,
+                f"{self.root}{endpoint}",
+                headers={"Content-Type": body.content_type},
+                data=body,
+            )
 
-        return self.make_request(
-            requests.post,
-            f"{self.root}{endpoint}",
-            headers={"Authorization": f"Bearer {self.auth['access_token']}"},
-            data=data,
-            files=files,
-            timeout=2000,
+        return self._authorized_request(
+            self.session.post, f"{self.root}{endpoint}", data=data
         )
+
+    def _fetch_page(self, endpoint, params):
+        """GET one page. Returns the parsed body and the response headers; raises on HTTP errors"""
+        url = f"{self.root}{endpoint}"
+        auth_headers = self._auth_headers()
+        response = self.session.get(url, headers=auth_headers, params=params, timeout=2000)
+        if response.status_code == 401:
+            # pages are fetched from several threads: replace the token this one sent,
+            # which another thread may already have renewed
+            self.auth = self.token(stale_token=self._sent_token(auth_headers))
+            response = self.session.get(
+                url, headers=self._auth_headers(), params=params, timeout=2000
+            )
+        response.raise_for_status()
+
+        return response.json(), response.headers
+
+    @staticmethod
+    def _page_count(headers, per_page):
+        """Number of pages from the X-Total header, else from the Link rel="last" page"""
+        per_page = int(headers.get("X-Per-Page") or per_page)
+        if headers.get("X-Total") is not None:
+            return math.ceil(int(headers["X-Total"]) / per_page) if per_page else 1
+        links = {rel: int(page) for page, rel in _LINK_PAGE.findall(headers.get("Link", ""))}
+        return links.get("last")
+
+    def paginate_(self, endpoint, key, per_page=100, max_workers=4, **params):
+        """Stream every record of a paged list endpoint.
+
+        The first page gives the page count (X-Total, or the Link header's last page);
+        the remaining pages are then fetched on a pool of `max_workers` threads, at
+        most two per worker ahead of the consumer, and yielded in order. Endpoints
+        that report neither header are walked page by page until an empty page.
+
+        Args:
+            endpoint (str): The path, e.g. "/api/admin/v2/topics".
+            key (str): The body key holding the records, e.g. "groups".
+            per_page (int): Records per page.
+            max_workers (int): Pages fetched at once.
+            params: Extra query string parameters, e.g. updated_since.
+
+        Yields:
+            dict: One record at a time.
+
+        Raises:
+            requests.exceptions.HTTPError: When a page request fails.
+        """
+        params = dict(params, per_page=per_page)
+        body, headers = self._fetch_page(endpoint, dict(params, page=1))
+        yield from body[key]
+
+        # the server may cap the page size below per_page: count pages by what it sent
+        pages = self._page_count(headers, len(body[key]) or per_page)
+        if pages is None:
+            # a short page is not necessarily the last; only an empty one is
+            page, records = 1, body[key]
+            while records:
+                page += 1
+                body, _ = self._fetch_page(endpoint, dict(params, page=page))
+                records = body[key]
+                yield from records
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = deque()
+            next_page = 2
+            while pending or next_page <= pages:
+                while next_page <= pages and len(pending) < 2 * max_workers:
+                    pending.append(
+                        executor.submit(self._fetch_page, endpoint, dict(params, page=next_page))
+                    )
+                    next_page += 1
+                body, _ = pending.popleft().result()
+                yield from body[key]
+
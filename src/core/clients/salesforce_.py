@@ -1,17 +1,242 @@
+import copy
+import csv
 import functools
+import io
+import json
 import os
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+from email.utils import formatdate
+from itertools import chain
+from urllib.parse import urlsplit
 
+import requests
 from dotenv import load_dotenv
-from simple_salesforce import Salesforce
-from simple_salesforce.exceptions import SalesforceMalformedRequest
+from requests.adapters import HTTPAdapter
+from simple_salesforce import Salesforce, format_soql
+from simple_salesforce.exceptions import (
+    SalesforceGeneralError,
+    SalesforceMalformedRequest,
+)
+from simple_salesforce.util import exception_handler
 
 load_dotenv()
 
 
+# Bulk API 2.0 limits and job polling
+BULK_MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+BULK_POLL_INITIAL = 1.0
+BULK_POLL_MAX = 30.0
+BULK_JOB_TIMEOUT = 60 * 60
+
+# Composite API limits
+COLLECTIONS_MAX_RECORDS = 200
+GRAPH_MAX_NODES = 500
+DUPLICATE_STATUS_CODES = {"DUPLICATES_DETECTED", "DUPLICATE_VALUE"}
+
+# REST query page size, passed as Sforce-Query-Options (Salesforce accepts 200-2000)
+QUERY_BATCH_SIZE = 2000
+
+# sObject describe cache: entries kept in memory, and seconds before Salesforce is asked again
+DESCRIBE_CACHE_SIZE = 64
+DESCRIBE_TTL = 24 * 60 * 60
+DESCRIBE_CACHE_DIR = os.getenv(
+    "SF_DESCRIBE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sf_describe_cache")
+)
+
+# results of query_bound_ kept in memory, and for how many seconds
+QUERY_CACHE_SIZE = 256
+QUERY_CACHE_TTL = 5 * 60
+
+# SalesforceNameIndex file. On ACI, point SF_NAME_INDEX at the mounted file share so a new
+# container starts from the last index instead of downloading every record again
+NAME_INDEX_PATH = os.getenv(
+    "SF_NAME_INDEX", os.path.join(os.path.expanduser("~"), ".cache", "sf_name_index.sqlite")
+)
+
+_FROM_ENTITY = re.compile(r"\bFROM\s+(\w+)", re.IGNORECASE)
+_SOQL_STRING = re.compile(r"'(?:\\.|[^'\\])*'")
+# sObjects named by a REST write: sobjects/<name> in a URL, record types and Bulk job objects
+_WRITTEN_ENTITY = re.compile(r'/sobjects/(\w+)|"(?:type|object)"\s*:\s*"(\w+)"')
+_WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
 class SalesforceAPIError(Exception):
     pass
 
 
+def _is_null(value):
+    """None, NaN, and pandas' NA and NaT"""
+    if value is None:
+        return True
+    # only a DataFrame brings pandas nulls, and then pandas is already imported
+    pd = sys.modules.get("pandas")
+    if pd is not None and pd.api.types.is_scalar(value):
+        return bool(pd.isna(value))
+    return isinstance(value, float) and value != value
+
+
+def _csv_value(value):
+    """Render a value for a Bulk API CSV cell (nulls become empty cells)."""
+    if _is_null(value):
+        return ""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, datetime):  # pandas Timestamps included
+        # Bulk API 2.0 dateTime: ISO 8601 in UTC; naive values are taken as UTC already
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat(timespec="milliseconds") + "Z"
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _iter_rows(records, fields=None):
+    """Returns the field names and an iterator of row dicts for a DataFrame or an iterable of dicts."""
+    if hasattr(records, "itertuples"):  # pandas DataFrame
+        columns = list(records.columns)
+        rows = (
+            dict(zip(columns, row))
+            for row in records.itertuples(index=False, name=None)
+        )
+        return fields or columns, rows
+
+    records = iter(records)
+    first = next(records, None)
+    if first is None:
+        return fields or [], iter(())
+    return fields or list(first.keys()), chain([first], records)
+
+
+def _spool_csv(records, fields=None, max_bytes=BULK_MAX_UPLOAD_BYTES):
+    """Stream records into CSV files of at most `max_bytes` each.
+
+    Rows are written one at a time to spooled temporary files (memory first, then
+    disk), so the full data set is never held in memory.
+    """
+    fields, rows = _iter_rows(records, fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+
+    def encode(row):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue().encode("utf-8")
+
+    header = encode(fields)
+    spool = None
+    for record in rows:
+        line = encode([_csv_value(record.get(field)) for field in fields])
+        if spool is None or spool.tell() + len(line) > max_bytes:
+            if spool is not None:
+                spool.seek(0)
+                yield spool
+            spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+            spool.write(header)
+        spool.write(line)
+
+    if spool is not None:
+        spool.seek(0)
+        yield spool
+
+
+def _append_flat(columns, record, row, prefix=""):
+    """Append one record to a columnar buffer, flattening relationships to "Account.Name".
+
+    Columns first seen at a later row are back-filled with None.
+    """
+    for key, value in record.items():
+        if key == "attributes":
+            continue
+        name = prefix + key
+        # parent relationships and compound fields nest; child subqueries ({"records": ...}) do not
+        if isinstance(value, dict) and "records" not in value:
+            _append_flat(columns, value, row, name + ".")
+            continue
+        values = columns.get(name)
+        if values is None:
+            values = columns[name] = [None] * row
+        elif len(values) < row:
+            values.extend([None] * (row - len(values)))
+        values.append(value)
+
+
+def to_columns(records):
+    """Flatten a page of query records into {column: [values]}, one list per field."""
+    columns = {}
+    for row, record in enumerate(records):
+        _append_flat(columns, record, row)
+    for values in columns.values():
+        values.extend([None] * (len(records) - len(values)))
+
+    # a null relationship ("Account": None) is already None in its "Account.*" columns
+    for name in [name for name in columns if "." in name]:
+        parent = name.rsplit(".", 1)[0]
+        if parent in columns and all(value is None for value in columns[parent]):
+            del columns[parent]
+
+    return columns
+
+
+def _query_entity(soql):
+    """The sObject a query reads: the outermost FROM, not a subquery's relationship."""
+    soql = _SOQL_STRING.sub("''", soql)
+    for match in _FROM_ENTITY.finditer(soql):
+        prefix = soql[: match.start()]
+        if prefix.count("(") == prefix.count(")"):
+            return match.group(1)
+    return None
+
+
+def _written_entities(request):
+    """The sObjects a successful REST request may have changed.
+
+    Returns:
+        set or None: Empty for reads and logins; None when a write's targets cannot be
+            told from the request (e.g. a Bulk batch upload), meaning any of them.
+    """
+    path = urlsplit(request.url).path
+    if request.method not in _WRITE_METHODS or "/services/data/" not in path:
+        return set()
+    if "/jobs/query" in path:
+        return set()
+    body = request.body
+    if isinstance(body, bytes):
+        body = body.decode("utf-8", "replace")
+    text = path + (body if isinstance(body, str) else "")
+    entities = {url or named for url, named in _WRITTEN_ENTITY.findall(text)}
+    return entities or None
+
+
+def build_soql(template, params=None):
+    """Fill a SOQL template with quoted, escaped values.
+
+    Placeholders use str.format syntax: "WHERE Name = {name}" with {"name": "O'Brien"}
+    gives "WHERE Name = 'O\\'Brien'". Lists become "('a','b')" for IN, dates and
+    datetimes become SOQL literals, "{name:like}" escapes for LIKE without quoting
+    and "{name:literal}" inserts the value as is.
+
+    Args:
+        template (str): The query with {} or {name} placeholders.
+        params (dict or list, optional): Named or positional values.
+    """
+    if params is None:
+        return template
+    if isinstance(params, dict):
+        return format_soql(template, **params)
+    return format_soql(template, *params)
+
+
 def extract_id_from_error_message(error_message):
     try:
         # Parsing the message from the error
@@ -33,73 +258,181 @@ def extract_id_from_error_message(error_message):
         print("Attempted to extract ID and failed. 🛠")
 
 
+def duplicate_record(errors):
+    """Returns the existing record a duplicate error points at, or None."""
+    record = None
+    try:
+        try:
+            duplicate_result = errors[0]["duplicateResut"]
+        except KeyError:
+            try:
+                duplicate_result = errors[0]["duplicateResult"]
+            except KeyError:
+                print(f"Attempting to handle SalesforceMalformedRequest: {errors} 🛠")
+                duplicate_result = {
+                    "matchResults": [
+                        {
+                            "matchRecords": [
+                                {
+                                    "record": {
+                                        "Id": extract_id_from_error_message(errors)
+                                    }
+                                }
+                            ]
+                        }
+                    ]
+                }
+        match_result = duplicate_result["matchResults"][0]
+        record = match_result["matchRecords"][0]["record"]
+
+        print(
+            f"Handled SalesforceMalformedRequest: extracted record ID {record['Id']} 🛠"
+        )
+    except Exception:
+        print(
+            f"Handled SalesforceMalformedRequest: Error: {errors[0]['message']} 🛠"
+        )
+
+    return record
+
+
 def handle_salesforce_malformed_request(func):
     """Decorator to handle SalesforceMalformedRequest exceptions."""
 
     @functools.wraps(func)  # Preserves information about the original function
     def wrapper(*args, **kwargs):
-        record = None
         try:
             return func(*args, **kwargs)  # Execute the original function
         except SalesforceMalformedRequest as exc:
-            duplicate_result = None
-            response_content = exc.content
+            record = duplicate_record(exc.content)
 
-            try:
-                try:
-                    duplicate_result = response_content[0]["duplicateResut"]
-                except KeyError:
-                    try:
-                        duplicate_result = response_content[0]["duplicateResult"]
-                    except KeyError:
-                        print(
-                            f"Attempting to handle SalesforceMalformedRequest: {response_content} 🛠"
-                        )
-                        duplicate_result = {
-                            "matchResults": [
-                                {
-                                    "matchRecords": [
-                                        {
-                                            "record": {
-                                                "Id": extract_id_from_error_message(
-                                                    response_content
-                                                )
-                                            }
-                                        }
-                                    ]
-                                }
-                            ]
-                        }
-                match_result = duplicate_result["matchResults"][0]
-                record = match_result["matchRecords"][0]["record"]
+            return {k.lower(): v for k, v in dict(record).items()}
 
-                print(
-                    f"Handled SalesforceMalformedRequest: extracted record ID {record['Id']} 🛠"
-                )
-            except Exception:
-                print(
-                    f"Handled SalesforceMalformedRequest: Error: {response_content[0]['message']} 🛠"
-                )
+    return wrapper
+
+
+def normalize_result(result, errors=None):
+    """Normalise one per-record result of a composite call.
+
+    Successes are returned with lower-cased keys, like create_. Duplicate errors
+    resolve to the existing record, like handle_salesforce_malformed_request.
+    Anything else is returned as {"success": False, "errors": [...]}, without an
+    "id", so `"id" in result` still tells created/existing records apart.
+    """
+    if errors is None:
+        if result.get("success"):
+            return {k.lower(): v for k, v in result.items()}
+        errors = result.get("errors") or []
 
+    # sObject Collections report "statusCode", composite graph "errorCode"
+    codes = {error.get("statusCode") or error.get("errorCode") for error in errors}
+    if codes & DUPLICATE_STATUS_CODES:
+        record = duplicate_record(errors)
+        if record and record.get("Id"):
             return {k.lower(): v for k, v in dict(record).items()}
 
-    return wrapper
+    return {"success": False, "errors": errors}
+
+
+class _SharedSalesforce(Salesforce):
+    """A Salesforce connection that several SalesforceClient instances and threads share.
+
+    simple_salesforce already logs in again when a call fails with INVALID_SESSION_ID;
+    this makes that re-login single-flight, so an expired session shared by many
+    threads is only renewed once.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._refresh_lock = threading.Lock()
+        self._sent = threading.local()
+        super().__init__(*args, **kwargs)
+        self.session.hooks["response"].append(self._record_session_id)
+        # every write, including sObject proxies (sf.Account.update), goes through here
+        self.session.hooks["response"].append(self._forget_written)
+
+    def _record_session_id(self, response, *args, **kwargs):
+        # simple_salesforce calls _refresh_session right after the rejected response, on
+        # the same thread, so this is the session id the failed request was sent with
+        authorization = response.request.headers.get("Authorization", "")
+        self._sent.session_id = (
+            authorization[len("Bearer "):] if authorization.startswith("Bearer ") else None
+        )
+
+    @staticmethod
+    def _forget_written(response, *args, **kwargs):
+        if response.status_code < 400:
+            entities = _written_entities(response.request)
+            if entities != set():
+                SalesforceClient._forget_queries(entities)
+
+    def _refresh_session(self):
+        stale_session_id = getattr(self._sent, "session_id", None)
+        with self._refresh_lock:
+            # not getattr: Salesforce.__getattr__ turns unknown attributes into sObjects
+            if stale_session_id and self.__dict__.get("session_id") != stale_session_id:
+                return  # another thread already logged in again
+            super()._refresh_session()
 
 
 class SalesforceClient:
     """_summary_"""
 
-    def __init__(self, *args, **kwargs):
+    # one logged-in connection per username, shared by every instance in the process
+    _session_lock = threading.Lock()
+    _shared_clients = {}
+
+    # describe results by (instance, sObject), least recently used first
+    _describe_lock = threading.Lock()
+    _describe_cache = OrderedDict()
+
+    # query_bound_ results by (instance, sObject, template, values), least recently used first
+    _query_lock = threading.Lock()
+    _query_cache = OrderedDict()
+
+    def __init__(self, *args, shared_session=True, pool_maxsize=10, **kwargs):
         """
         Initialize the class with your client and attach all of your endpoints
+
+        Args:
+            shared_session (bool): Reuse the process-wide logged-in session and connection
+                pool for SF_ACCOUNT, logging in only if there is none yet. Pass False for
+                a private login.
+            pool_maxsize (int): Connections kept open to the instance, when a new
+                session is created.
         """
+        username = os.getenv("SF_ACCOUNT")
+        if not shared_session:
+            self.client_ = self._login(username, pool_maxsize)
+            return
+
+        with SalesforceClient._session_lock:
+            client_ = SalesforceClient._shared_clients.get(username)
+            if client_ is None:
+                client_ = self._login(username, pool_maxsize)
+                SalesforceClient._shared_clients[username] = client_
+        self.client_ = client_
+
+    @staticmethod
+    def _login(username, pool_maxsize):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        session.mount("https://", adapter)
 
-        self.client_ = Salesforce(
-            username=os.getenv("SF_ACCOUNT"),
+        return _SharedSalesforce(
+            username=username,
             password=os.getenv("SF_SECRET"),
             security_token=os.getenv("SF_TOKEN"),
+            session=session,
         )
 
+    @classmethod
+    def clear_sessions(cls):
+        """Forget the shared sessions, e.g. after changing SF_ACCOUNT. The next client logs in again."""
+        with cls._session_lock:
+            for client_ in cls._shared_clients.values():
+                client_.session.close()
+            cls._shared_clients.clear()
+
     @handle_salesforce_malformed_request
     def query_(self, *args, **kwargs):
         """Makes Request"""
@@ -118,6 +451,65 @@ class SalesforceClient:
 
         return {k.lower(): v for k, v in dict(response).items()}
 
+    def query_bound_(self, template, params=None, ttl=QUERY_CACHE_TTL, all_records=True):
+        """Run a SOQL template with bound values, caching the result in memory.
+
+        Identical lookups (same template, ignoring whitespace, and same values) within
+        `ttl` seconds are answered from the process-wide cache, filed under the sObject
+        of the outermost FROM. Any successful write to that sObject through the shared
+        session, sObject proxies included, drops its cached queries.
+
+        Args:
+            template (str): The query with placeholders, see build_soql.
+            params (dict or list, optional): The values to bind.
+            ttl (int): Seconds a result is reused. 0 skips the cache.
+            all_records (bool): Follow every page like query_all_, rather than query_.
+
+        Returns:
+            dict: The result with lower-cased top-level keys, as from query_all_.
+        """
+        soql = build_soql(template, params)
+        if not ttl:
+            return self.query_all_(soql) if all_records else self.query_(soql)
+
+        entity = _query_entity(template)
+        key = (
+            self.client_.sf_instance,
+            entity.lower() if entity else None,
+            " ".join(template.split()),
+            repr(sorted(params.items()) if isinstance(params, dict) else params),
+            all_records,
+        )
+        with SalesforceClient._query_lock:
+            cached = SalesforceClient._query_cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                SalesforceClient._query_cache.move_to_end(key)
+                return copy.deepcopy(cached[1])
+
+        result = self.query_all_(soql) if all_records else self.query_(soql)
+        with SalesforceClient._query_lock:
+            SalesforceClient._query_cache[key] = (time.monotonic() + ttl, copy.deepcopy(result))
+            SalesforceClient._query_cache.move_to_end(key)
+            while len(SalesforceClient._query_cache) > QUERY_CACHE_SIZE:
+                SalesforceClient._query_cache.popitem(last=False)
+
+        return result
+
+    @staticmethod
+    def _forget_queries(entities=None):
+        """Drop cached query_bound_ results that read from the given sObjects, or all of them.
+
+        Called by the shared session for every successful write, so creates and updates
+        through any path (helpers, sObject proxies, composite and Bulk calls) count.
+        """
+        with SalesforceClient._query_lock:
+            if entities is None:
+                SalesforceClient._query_cache.clear()
+                return
+            entities = {entity.lower() for entity in entities if entity}
+            for key in [key for key in SalesforceClient._query_cache if key[1] in entities]:
+                del SalesforceClient._query_cache[key]
+
     @handle_salesforce_malformed_request
     def create_(self, entity, *args, **kwargs):
         """Makes Request"""
@@ -153,6 +545,420 @@ class SalesforceClient:
 
         return res
 
+    def _collection_records(self, entity, records):
+        for record in records:
+            if "attributes" in record:
+                yield record
+            else:
+                yield {"attributes": {"type": entity}, **record}
+
+    def _collections_(self, method, entity, records, all_or_none=False):
+        results = []
+        records = list(self._collection_records(entity, records))
+        for start in range(0, len(records), COLLECTIONS_MAX_RECORDS):
+            response = self.client_._call_salesforce(
+                method,
+                f"{self.client_.base_url}composite/sobjects",
+                json={
+                    "allOrNone": all_or_none,
+                    "records": records[start : start + COLLECTIONS_MAX_RECORDS],
+                },
+            )
+            results.extend(normalize_result(result) for result in response.json())
+
+        return results
+
+    def create_many_(self, entity, records, all_or_none=False):
+        """Create records with sObject Collections, 200 per request.
+
+        Args:
+            entity (str): The sObject, e.g. "Contact". Records that carry their own
+                {"attributes": {"type": ...}} keep it, so one call can create several
+                types; pass entity=None when all of them do.
+            records (list): Field dicts.
+            all_or_none (bool): Roll back each request of 200 if any record in it fails.
+
+        Returns:
+            list: One result per record, in order. See normalize_result; duplicates
+                resolve to the existing record.
+        """
+        return self._collections_("POST", entity, records, all_or_none)
+
+    def update_many_(self, entity, records, all_or_none=False):
+        """Update records with sObject Collections, 200 per request. Each record needs an "Id".
+        See create_many_."""
+        return self._collections_("PATCH", entity, records, all_or_none)
+
+    def create_graph_(self, nodes):
+        """Create dependent records in one composite graph request.
+
+        Later nodes can reference earlier ones with "@{reference_id.id}", e.g.
+        {"Contact__c": "@{contact.id}"}. The graph is all or nothing: if any node
+        fails every node is rolled back.
+
+        Args:
+            nodes (list): (reference_id, entity, record) tuples, in dependency order.
+
+        Returns:
+            dict: Normalised results keyed by reference_id (see normalize_result).
+        """
+        if len(nodes) > GRAPH_MAX_NODES:
+            raise SalesforceAPIError(
+                f"A composite graph takes at most {GRAPH_MAX_NODES} nodes, got {len(nodes)}"
+            )
+
+        sobjects_url = f"/services/data/v{self.client_.sf_version}/sobjects"
+        response = self.client_._call_salesforce(
+            "POST",
+            f"{self.client_.base_url}composite/graph",
+            json={
+                "graphs": [
+                    {
+                        "graphId": "graph",
+                        "compositeRequest": [
+                            {
+                                "method": "POST",
+                                "url": f"{sobjects_url}/{entity}",
+                                "referenceId": reference_id,
+                                "body": record,
+                            }
+                            for reference_id, entity, record in nodes
+                        ],
+                    }
+                ]
+            },
+        ).json()
+
+        results = {}
+        for sub in response["graphs"][0]["graphResponse"]["compositeResponse"]:
+            body = sub["body"]
+            if isinstance(body, list):  # failed nodes return a list of errors
+                results[sub["referenceId"]] = normalize_result(None, errors=body)
+            else:
+                results[sub["referenceId"]] = normalize_result(body)
+
+        return results
+
+    def _query_page(self, url, params=None, batch_size=QUERY_BATCH_SIZE):
+        """Fetch one page of query results. Returns the records and the next page url or None."""
+        response = self.client_._call_salesforce(
+            "GET",
+            url,
+            params=params,
+            headers={"Sforce-Query-Options": f"batchSize={batch_size}"},
+        ).json()
+        next_url = None
+        if not response["done"]:
+            next_url = f"https://{self.client_.sf_instance}{response['nextRecordsUrl']}"
+
+        return response["records"], next_url
+
+    def _iter_query_pages(self, soql, batch_size, prefetch, include_deleted):
+        """Yield query pages as lists, holding at most one page (two when prefetching) in memory."""
+        endpoint = "queryAll" if include_deleted else "query"
+        url, params = f"{self.client_.base_url}{endpoint}/", {"q": soql}
+        if not prefetch:
+            while url:
+                records, url = self._query_page(url, params, batch_size)
+                params = None
+                yield records
+            return
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(self._query_page, url, params, batch_size)
+            while future:
+                records, url = future.result()
+                future = executor.submit(self._query_page, url, None, batch_size) if url else None
+                yield records
+
+    def iter_query(self, soql, batch_size=QUERY_BATCH_SIZE, prefetch=False, include_deleted=False):
+        """Stream the records of a SOQL query as pages arrive, instead of collecting them like query_all_.
+
+        Args:
+            soql (str): The query.
+            batch_size (int): Records per page (200-2000), sent as the Sforce-Query-Options header.
+                Salesforce may return smaller pages.
+            prefetch (bool): Fetch the next page on a background thread while the current one is consumed.
+            include_deleted (bool): Use queryAll to include deleted and archived records.
+
+        Yields:
+            dict: Records as returned by the API, including their "attributes".
+        """
+        for records in self._iter_query_pages(soql, batch_size, prefetch, include_deleted):
+            yield from records
+
+    def iter_query_batches(
+        self,
+        soql,
+        batch_size=QUERY_BATCH_SIZE,
+        prefetch=False,
+        include_deleted=False,
+        output="columns",
+    ):
+        """Stream a SOQL query one page at a time as columnar batches.
+
+        Relationship fields are flattened to dotted columns ("Account.Owner.Name") while
+        the page is read, so no per-record dicts are built. See iter_query for the
+        other arguments.
+
+        Args:
+            output (str): "columns" for {column: [values]}, "pandas" for a DataFrame or
+                "arrow" for a pyarrow Table. pandas and pyarrow are only imported when asked for.
+
+        Yields:
+            One batch per page.
+        """
+        if output == "pandas":
+            import pandas as pd
+
+            convert = pd.DataFrame
+        elif output == "arrow":
+            import pyarrow as pa
+
+            convert = pa.table
+        elif output == "columns":
+            convert = None
+        else:
+            raise ValueError(f"output must be 'columns', 'pandas' or 'arrow', not {output!r}")
+
+        for records in self._iter_query_pages(soql, batch_size, prefetch, include_deleted):
+            columns = to_columns(records)
+            yield convert(columns) if convert else columns
+
+    def _describe_path(self, key):
+        instance, entity = key
+        return os.path.join(DESCRIBE_CACHE_DIR, f"{instance}_{entity}.json")
+
+    @staticmethod
+    def _remember_describe(key, entry):
+        with SalesforceClient._describe_lock:
+            SalesforceClient._describe_cache[key] = entry
+            SalesforceClient._describe_cache.move_to_end(key)
+            while len(SalesforceClient._describe_cache) > DESCRIBE_CACHE_SIZE:
+                SalesforceClient._describe_cache.popitem(last=False)
+
+    def _read_describe(self, key):
+        with SalesforceClient._describe_lock:
+            entry = SalesforceClient._describe_cache.get(key)
+            if entry is not None:
+                SalesforceClient._describe_cache.move_to_end(key)
+                return entry
+        try:
+            with open(self._describe_path(key), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # later calls in this process skip re-reading and re-parsing the file
+        self._remember_describe(key, entry)
+        return entry
+
+    def _write_describe(self, key, entry):
+        self._remember_describe(key, entry)
+
+        try:
+            os.makedirs(DESCRIBE_CACHE_DIR, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=DESCRIBE_CACHE_DIR, suffix=".tmp")
+            with os.fdopen(fd, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._describe_path(key))
+        except OSError as exc:
+            print(f"Could not persist describe cache: {exc}")
+
+    def describe_(self, entity, ttl=DESCRIBE_TTL):
+        """Describe an sObject, served from an in-process LRU and an on-disk cache.
+
+        Cached results younger than `ttl` seconds are returned without calling
+        Salesforce, including across processes and flow runs. Older ones are
+        revalidated with If-Modified-Since, so an unchanged sObject costs a 304
+        instead of the full payload.
+
+        Args:
+            entity (str): The sObject, e.g. "Account".
+            ttl (int): Seconds a cached describe is trusted. 0 always revalidates.
+
+        Returns:
+            dict: The describe result, as from sf.<entity>.describe().
+        """
+        key = (self.client_.sf_instance, entity)
+        entry = self._read_describe(key)
+        if entry and time.time() - entry["checked_at"] < ttl:
+            return entry["describe"]
+
+        headers = {}
+        if entry:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = self.client_._call_salesforce(
+                "GET",
+                f"{self.client_.base_url}sobjects/{entity}/describe",
+                headers=headers,
+            )
+        except SalesforceGeneralError as exc:
+            if exc.status != 304:
+                raise
+            entry["checked_at"] = time.time()
+        else:
+            entry = {
+                "describe": response.json(),
+                "last_modified": response.headers.get("Last-Modified")
+                or formatdate(usegmt=True),
+                "checked_at": time.time(),
+            }
+        self._write_describe(key, entry)
+
+        return entry["describe"]
+
+    def soql_fields(self, entity, exclude=(), ttl=DESCRIBE_TTL):
+        """Returns the comma-separated names of every field of an sObject, for a SELECT.
+
+        Args:
+            entity (str): The sObject, e.g. "Account".
+            exclude (iterable): Field names to leave out.
+            ttl (int): See describe_.
+        """
+        exclude = set(exclude)
+        return ", ".join(
+            field["name"]
+            for field in self.describe_(entity, ttl)["fields"]
+            if field["name"] not in exclude
+        )
+
+    def _bulk_url(self, path):
+        return f"{self.client_.base_url}jobs/{path}"
+
+    def _wait_for_bulk_job(self, job_type, job_id, timeout=BULK_JOB_TIMEOUT):
+        """Poll a Bulk API 2.0 job with jittered exponential backoff until it finishes."""
+        delay = BULK_POLL_INITIAL
+        deadline = time.monotonic() + timeout
+        while True:
+            job = self.client_._call_salesforce(
+                "GET", self._bulk_url(f"{job_type}/{job_id}")
+            ).json()
+            if job["state"] == "JobComplete":
+                return job
+            if job["state"] in ("Failed", "Aborted"):
+                raise SalesforceAPIError(
+                    f"Bulk job {job_id} {job['state']}: {job.get('errorMessage', job)}"
+                )
+            if time.monotonic() > deadline:
+                raise SalesforceAPIError(
+                    f"Bulk job {job_id} did not finish within {timeout}s (state: {job['state']})"
+                )
+            time.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, BULK_POLL_MAX)
+
+    def _csv_response(self, url, **kwargs):
+        """Returns a streamed CSV response and a DictReader reading straight from its socket."""
+        response = self.client_._call_salesforce(
+            "GET", url, stream=True, headers={"Accept": "text/csv"}, **kwargs
+        )
+        response.raw.decode_content = True
+        rows = csv.DictReader(io.TextIOWrapper(response.raw, encoding="utf-8", newline=""))
+
+        return response, rows
+
+    def _upload_csv(self, url, data):
+        """PUT a spooled CSV, logging in again once if the session has expired.
+
+        Not through _call_salesforce: its INVALID_SESSION_ID retry re-sends the body from
+        where the failed attempt left it (the end of the file) and drops the Content-Type.
+        """
+        client_ = self.client_
+        for attempt in range(2):
+            data.seek(0)
+            headers = dict(client_.headers)
+            headers["Content-Type"] = "text/csv"
+            result = client_.session.request("PUT", url, data=data, headers=headers)
+            if attempt or result.status_code != 401 or client_._salesforce_login_partial is None:
+                break
+            client_._refresh_session()
+        if result.status_code >= 300:
+            exception_handler(result, name=url)
+        return result
+
+    def _bulk_ingest(self, entity, operation, records, fields=None, external_id_field=None):
+        jobs = []
+        for data in _spool_csv(records, fields):
+            with data:
+                job_spec = {
+                    "object": entity,
+                    "operation": operation,
+                    "contentType": "CSV",
+                    "lineEnding": "LF",
+                }
+                if external_id_field:
+                    job_spec["externalIdFieldName"] = external_id_field
+                job = self.client_._call_salesforce(
+                    "POST", self._bulk_url("ingest"), json=job_spec
+                ).json()
+                self._upload_csv(self._bulk_url(f"ingest/{job['id']}/batches"), data)
+                self.client_._call_salesforce(
+                    "PATCH",
+                    self._bulk_url(f"ingest/{job['id']}"),
+                    json={"state": "UploadComplete"},
+                )
+                jobs.append(job["id"])
+
+        # uploads are sequential; Salesforce processes the jobs in parallel meanwhile
+        return [self._wait_for_bulk_job("ingest", job_id) for job_id in jobs]
+
+    def bulk_insert(self, entity, records, fields=None):
+        """Insert records with Bulk API 2.0.
+
+        Args:
+            entity (str): The sObject, e.g. "Contact".
+            records: An iterable of dicts or a pandas DataFrame. Streamed to CSV and split
+                into one job per 100MB.
+            fields (list, optional): Columns to send. Defaults to the keys of the first record.
+
+        Returns:
+            list: The final job info of each job (id, numberRecordsProcessed, numberRecordsFailed...).
+                Use bulk_results to stream the per-record outcome.
+        """
+        return self._bulk_ingest(entity, "insert", records, fields)
+
+    def bulk_upsert(self, entity, records, external_id_field, fields=None):
+        """Upsert records by external id with Bulk API 2.0. See bulk_insert."""
+        return self._bulk_ingest(entity, "upsert", records, fields, external_id_field)
+
+    def bulk_results(self, job_id, failed=False):
+        """Stream the successful (sf__Id, sf__Created, ...) or failed (sf__Id, sf__Error, ...)
+        records of an ingest job."""
+        kind = "failedResults" if failed else "successfulResults"
+        response, rows = self._csv_response(self._bulk_url(f"ingest/{job_id}/{kind}/"))
+        with response:
+            yield from rows
+
+    def bulk_query(self, soql, max_records=50000, include_deleted=False):
+        """Run a Bulk API 2.0 query and stream its rows as dicts of strings.
+
+        Result pages of up to `max_records` rows are fetched one at a time by locator.
+        """
+        job = self.client_._call_salesforce(
+            "POST",
+            self._bulk_url("query"),
+            json={
+                "operation": "queryAll" if include_deleted else "query",
+                "query": soql,
+            },
+        ).json()
+        self._wait_for_bulk_job("query", job["id"])
+
+        locator = None
+        while True:
+            params = {"maxRecords": max_records}
+            if locator:
+                params["locator"] = locator
+            response, rows = self._csv_response(
+                self._bulk_url(f"query/{job['id']}/results"), params=params
+            )
+            with response:
+                yield from rows
+            locator = response.headers.get("Sforce-Locator")
+            if not locator or locator == "null":
+                return
+
     def get_entity_client(self, entity):
         """
         Retrieve the client for a specific Salesforce entity (e.g., Opportunity, Account).
@@ -164,3 +970,178 @@ class SalesforceClient:
         Dynamically access Salesforce objects as attributes (e.g., sf.Opportunity).
         """
         return self.get_entity_client(name)
+
+
+class SalesforceNameIndex:
+    """Local SQLite index of an sObject's records by case-folded name.
+
+    Lookups read the local file. At most every `refresh_interval` seconds the index
+    pulls the records changed since the last SystemModstamp seen, including deletions;
+    every `reconcile_interval` seconds it is rebuilt in full. Both run in a background
+    thread started by a lookup that finds the index due; lookups never wait on
+    Salesforce, and return None until the first build is done.
+    """
+
+    def __init__(
+        self,
+        entity,
+        fields=("Id", "Name"),
+        name_field="Name",
+        path=None,
+        client=None,
+        refresh_interval=60,
+        reconcile_interval=24 * 60 * 60,
+    ):
+        """
+        Args:
+            entity (str): The sObject, e.g. "c4g_Club_Chapter__c".
+            fields (tuple): Fields stored and returned for each record. Must include "Id".
+            name_field (str): The field looked up by name.
+            path (str, optional): The SQLite file. Defaults to NAME_INDEX_PATH.
+            client (SalesforceClient, optional): Created on the first refresh when not given.
+        """
+        self.entity = entity
+        self.fields = tuple(fields)
+        self.name_field = name_field
+        self.path = path or NAME_INDEX_PATH
+        self.refresh_interval = refresh_interval
+        self.reconcile_interval = reconcile_interval
+        self._client = client
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._build = None
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS names ("
+            "entity TEXT, id TEXT, key TEXT, record TEXT, PRIMARY KEY (entity, id))"
+        )
+        self._execute("CREATE INDEX IF NOT EXISTS names_key ON names (entity, key)")
+        self._execute(
+            "CREATE TABLE IF NOT EXISTS name_index_state ("
+            "entity TEXT PRIMARY KEY, watermark TEXT, refreshed_at REAL, reconciled_at REAL)"
+        )
+
+    @staticmethod
+    def key(name):
+        return (name or "").strip().casefold()
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def _state(self):
+        rows = self._execute(
+            "SELECT watermark, refreshed_at, reconciled_at FROM name_index_state WHERE entity = ?",
+            (self.entity,),
+        )
+        return rows[0] if rows else (None, 0.0, 0.0)
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = SalesforceClient()
+        return self._client
+
+    def refresh(self, force=False):
+        """Apply Salesforce changes since the last refresh, or rebuild the index when due.
+
+        Every page is fetched before the file is written, so the write transaction only
+        lasts as long as the inserts and other readers and writers are not held up.
+        """
+        with self._lock:
+            watermark, refreshed_at, reconciled_at = self._state()
+            now = time.time()
+            if not force and now - refreshed_at < self.refresh_interval:
+                return
+
+            reconcile = watermark is None or now - reconciled_at >= self.reconcile_interval
+            soql = f"SELECT {', '.join(self.fields)}, IsDeleted, SystemModstamp FROM {self.entity}"
+            if not reconcile:
+                # >= re-reads the records on the watermark; upserting them again is harmless
+                since = datetime.strptime(watermark, "%Y-%m-%dT%H:%M:%S.%f%z")
+                soql += build_soql(" WHERE SystemModstamp >= {}", [since])
+            soql += " ORDER BY SystemModstamp"
+
+            upserts, deletes = [], []
+            for records in self.client._iter_query_pages(
+                soql, QUERY_BATCH_SIZE, prefetch=True, include_deleted=not reconcile
+            ):
+                for record in records:
+                    watermark = max(watermark or "", record["SystemModstamp"])
+                    if record["IsDeleted"]:
+                        deletes.append((self.entity, record["Id"]))
+                        continue
+                    upserts.append(
+                        (
+                            self.entity,
+                            record["Id"],
+                            self.key(record[self.name_field]),
+                            json.dumps({f: record.get(f) for f in self.fields}),
+                        )
+                    )
+
+            conn = self._connect()
+            try:
+                with conn:
+                    if reconcile:
+                        conn.execute("DELETE FROM names WHERE entity = ?", (self.entity,))
+                    conn.executemany("DELETE FROM names WHERE entity = ? AND id = ?", deletes)
+                    conn.executemany("INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)", upserts)
+                    conn.execute(
+                        "INSERT OR REPLACE INTO name_index_state VALUES (?, ?, ?, ?)",
+                        (self.entity, watermark, now, now if reconcile else reconciled_at),
+                    )
+            finally:
+                conn.close()
+
+    def _refresh_in_background(self):
+        with self._build_lock:
+            if self._build is None or not self._build.is_alive():
+                self._build = threading.Thread(target=self._background_refresh, daemon=True)
+                self._build.start()
+
+    def _background_refresh(self):
+        try:
+            self.refresh()
+        except Exception as exc:
+            # lookups keep serving the local data; the next due lookup tries again
+            print(f"Refreshing the {self.entity} name index failed: {exc}")
+
+    def lookup(self, name):
+        """Returns the records whose name matches, ignoring case and surrounding whitespace.
+
+        Only reads the local file. When a refresh is due, it is started in the background
+        and this lookup still answers from the current data, so a record created
+        elsewhere shows up once a refresh that started after its creation has finished.
+
+        Args:
+            name (str): The name to look up.
+
+        Returns:
+            list: Dicts of the indexed fields; empty when there is no such record.
+                None when the index has never been built or cannot be read: query
+                Salesforce instead.
+        """
+        try:
+            _, refreshed_at, reconciled_at = self._state()
+            if time.time() - refreshed_at >= self.refresh_interval:
+                self._refresh_in_background()
+            if not reconciled_at:
+                return None
+
+            rows = self._execute(
+                "SELECT record FROM names WHERE entity = ? AND key = ?",
+                (self.entity, self.key(name)),
+            )
+        except sqlite3.Error as exc:
+            print(f"Could not read the {self.entity} name index: {exc}")
+            return None
+
+        return [json.loads(row[0]) for row in rows]
@@ -146,10 +146,8 @@ class ResultType(BaseModel):
 def fetch_opportunity(AccountId: str) -> List[Opportunity]:
     opportunity = None
     sf_ = SalesforceClient()
-    opportunity_metadata = sf_.Opportunity.describe()
-    field_names = [field["name"] for field in opportunity_metadata["fields"]]
-    query = f"SELECT {', '.join(field_names)} FROM Opportunity WHERE AccountId = '{AccountId}'"
-    opportunities = sf_.query_all(query).get("records", "")
+    query = f"SELECT {sf_.soql_fields('Opportunity')} FROM Opportunity WHERE AccountId = {{account_id}}"
+    opportunities = sf_.query_bound_(query, {"account_id": AccountId}).get("records", "")
     if len(opportunities):
         opportunity = opportunities[0]
         print(f"{opportunity["Name"]} opportunity fetched.")
@@ -160,9 +158,7 @@ def fetch_opportunity(AccountId: str) -> List[Opportunity]:
 @task(cache_policy=INPUTS, cache_expiration=timedelta)
 def fetch_accounts():
     sf_ = SalesforceClient()
-    account_metadata = sf_.Account.describe()
-    field_names = [field["name"] for field in account_metadata["fields"]]
-    query = f"SELECT {', '.join(field_names)} FROM Account"
+    query = f"SELECT {sf_.soql_fields('Account')} FROM Account"
     accounts = sf_.query_all(query).get("records", "")
     print(f"Found {len(accounts)} accounts.")
 
@@ -173,10 +169,8 @@ def fetch_accounts():
 def fetch_account(Name: str):
     account = None
     sf_ = SalesforceClient()
-    account_metadata = sf_.Account.describe()
-    field_names = [field["name"] for field in account_metadata["fields"]]
-    query = f"SELECT {', '.join(field_names)} FROM Account WHERE Name = '{Name}'"
-    accounts = sf_.query(query).get("records", "")
+    query = f"SELECT {sf_.soql_fields('Account')} FROM Account WHERE Name = {{name}}"
+    accounts = sf_.query_bound_(query, {"name": Name}, all_records=False).get("records", "")
     if len(accounts):
         account = accounts[0]
         print(f"{account["Name"]} account fetched.")
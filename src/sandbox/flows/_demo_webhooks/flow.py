@@ -28,10 +28,8 @@ from src.sandbox.flows.club_registration.lib.api import (
     get_or_create_hb_user,
 )
 from src.sandbox.flows.club_registration.lib.api.salesforce import (
-    create_chapter,
-    create_constituent,
-    create_contact,
-    search_for_club,
+    create_club_records,
+    find_club,
 )
 from src.sandbox.flows.club_registration.typeform import FormResponse
 from src.sandbox.flows.club_registration.validations import (
@@ -144,13 +142,11 @@ def check_if_club_exists(data):
 
     # Check Salesforce
     print(f"Checking Salesforce to see if {club_name} exists...")
-    results = search_for_club(club_name)
-    if results.get("records") and results["records"][0]["Name"].lower() == club_name:
-        print(
-            f"{club_name} already exists in Salesforce as object {results['records'][0]['Id']}👷"
-        )
+    clubs = find_club(club_name)
+    if clubs:
+        print(f"{club_name} already exists in Salesforce as object {clubs[0]['Id']}👷")
         in_salesforce = True
-        group_id = results["records"][0]["c4g_Group_Id__c"]
+        group_id = clubs[0]["c4g_Group_Id__c"]
     else:
         # Check Hivebrite
         print(f"Double checking Hivebrite to see if {club_name} exists...")
@@ -386,12 +382,8 @@ def prepare_data_for_salesforce(new_group: dict, form_data: dict, user: dict):
 @task(log_prints=True, name="Upload Data to Salesforce")
 def upload_to_salesforce(post_object):
     """Upload data to salesforce"""
-    # create chapter club
-    contact = create_contact(post_object)
-
-    chapter = create_chapter(post_object)
-
-    constituent = create_constituent(post_object, chapter, contact)
+    # create contact and chapter club, then link them
+    contact, chapter, constituent = create_club_records(post_object)
     if "id" in contact.keys() and "id" in chapter.keys() and "id" in constituent.keys():
         print("Data successfully uploaded to salesforce...👷")
 
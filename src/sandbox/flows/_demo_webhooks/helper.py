@@ -1,11 +1,18 @@
 import csv
 import difflib
+import functools
+import hashlib
 import json
 import os
+import shutil
 import sys
+import tempfile
+import time
+from collections import defaultdict
 from dataclasses import dataclass
 from pathlib import Path
 from typing import List
+from urllib.parse import urlsplit
 
 import requests
 
@@ -20,6 +27,14 @@ def get_project_root() -> Path:
 # get the root directory
 root_dir = get_project_root()
 
+# downloaded club images, shared by every run on this machine
+IMAGE_CACHE_DIR = os.getenv(
+    "CLUB_IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "club_image_cache")
+)
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("CLUB_IMAGE_CACHE_MAX_BYTES", 200 * 1024 * 1024))
+# cached images younger than this are used without asking the server
+IMAGE_CACHE_MAX_AGE = 60 * 60
+
 
 class GlobalISO:
     def __init__(self, code, english, spanish, portuguese):
@@ -75,6 +90,69 @@ class UserBasic:
     pass
 
 
+def _trigrams(text):
+    text = f"  {text.casefold()} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class CountryIndex:
+    """Country names of one language, indexed for exact and fuzzy lookup.
+
+    Exact matches are a case-folded dict lookup. Fuzzy matches take the few names
+    sharing the most trigrams with the query and rank only those with difflib, so
+    a miss no longer compares the query against every country.
+    """
+
+    candidates = 10
+
+    def __init__(self, codes: List[GlobalISO], language: str):
+        self.entries = []
+        self.exact = {}
+        self.by_trigram = defaultdict(list)
+        for code in codes:
+            name = code.get_name_for_language(language)
+            if not name:
+                continue
+            position = len(self.entries)
+            self.entries.append((code.code, name))
+            self.exact.setdefault(name.casefold(), position)
+            for trigram in _trigrams(name):
+                self.by_trigram[trigram].append(position)
+
+    def resolve(self, country_name: str, cutoff: float = 0.4):
+        """Returns (ISO code, name) of the exact or closest country name, or (None, None)."""
+        position = self.exact.get(country_name.casefold())
+        if position is not None:
+            return self.entries[position]
+
+        shared = defaultdict(int)
+        for trigram in _trigrams(country_name):
+            for position in self.by_trigram.get(trigram, ()):
+                shared[position] += 1
+        candidates = sorted(shared, key=shared.get, reverse=True)[: self.candidates]
+        if not candidates:
+            # nothing in common at trigram level: fall back to scanning every name
+            candidates = range(len(self.entries))
+
+        names = [self.entries[position][1] for position in candidates]
+        closest_matches = difflib.get_close_matches(country_name, names, n=1, cutoff=cutoff)
+        if closest_matches:
+            return self.entries[candidates[names.index(closest_matches[0])]]
+
+        return None, None
+
+
+@functools.lru_cache(maxsize=None)
+def country_index(language: str) -> CountryIndex:
+    """The CountryIndex for a language, built from the country data once per process."""
+    return CountryIndex(load_global_country_data(), language)
+
+
+@functools.lru_cache(maxsize=4096)
+def _resolve_country(country_name: str, language: str):
+    return country_index(language).resolve(country_name)
+
+
 @log_err_(
     title="Get Globalized ISO Error",
     content="There was an error when trying get globalized iso data.",
@@ -89,26 +167,20 @@ def get_globalized_iso(country_name: str, language: str) -> str:
     Returns:
         str: The ISO code of the country.
     """
-    codes = load_global_country_data()
+    return _resolve_country(country_name, language)
 
-    # Try exact match first
-    for code in codes:
-        if code.get_name_for_language(language).casefold() == country_name.casefold():
-            return code.code, code.get_name_for_language(language)
 
-    # Use difflib to find the best match
-    country_names = [code.get_name_for_language(language) for code in codes]
-    closest_matches = difflib.get_close_matches(
-        country_name, country_names, n=1, cutoff=0.4
-    )
+def resolve_many(names: List[str], language: str):
+    """Get the ISO code and country name for many country names at once.
 
-    if closest_matches:
-        best_match = closest_matches[0]
-        for code in codes:
-            if code.get_name_for_language(language) == best_match:
-                return code.code, code.get_name_for_language(language)
+    Args:
+        names (List[str]): Country names, as users typed them.
+        language (str): The language of the names.
 
-    return None, None
+    Returns:
+        list: One (ISO code, name) tuple per input name, (None, None) when nothing matches.
+    """
+    return [_resolve_country(name, language) for name in names]
 
 
 def must_open_(file_path):
@@ -120,14 +192,122 @@ def must_open_(file_path):
         raise e
 
 
-def download_file(url, filepath):
-    """Download a file from a URL and save it to a local file path."""
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"Failed to download file: {url}")
+def _write_json(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _evict_images(max_bytes=IMAGE_CACHE_MAX_BYTES, keep=None):
+    """Delete the least recently used cached images until the cache fits in max_bytes.
+
+    `keep` (the blob about to be handed to the caller) is never deleted. Downloads in
+    progress are written to IMAGE_CACHE_DIR/tmp, so they are not seen here.
+    """
+    blobs_dir = os.path.join(IMAGE_CACHE_DIR, "blobs")
+    blobs = []
+    for entry in os.scandir(blobs_dir):
+        try:
+            stat = entry.stat()
+        except OSError:
+            continue  # evicted by another run meanwhile
+        blobs.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in blobs)
+    for _, size, path in sorted(blobs):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        total -= size
+
+
+def cached_download(url, max_age=IMAGE_CACHE_MAX_AGE):
+    """Returns the path of a local copy of url, downloading it only when it changed.
+
+    Files are stored by the SHA-256 of their content, so every URL serving the same
+    image shares one copy. A copy checked less than max_age seconds ago is used as
+    is; an older one is revalidated with a conditional GET (ETag / Last-Modified).
+    Downloads are streamed to disk in chunks. The least recently used files are
+    evicted past IMAGE_CACHE_MAX_BYTES.
+
+    Treat the returned file as read-only: it is shared with other runs, and another
+    run's eviction may delete it later (see download_file).
+    """
+    urls_dir = os.path.join(IMAGE_CACHE_DIR, "urls")
+    blobs_dir = os.path.join(IMAGE_CACHE_DIR, "blobs")
+    tmp_dir = os.path.join(IMAGE_CACHE_DIR, "tmp")
+    for directory in (urls_dir, blobs_dir, tmp_dir):
+        os.makedirs(directory, exist_ok=True)
+
+    meta_path = os.path.join(urls_dir, hashlib.sha256(url.encode()).hexdigest() + ".json")
+    try:
+        with open(meta_path, "r") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        meta = None
+
+    headers = {}
+    if meta:
+        blob_path = os.path.join(blobs_dir, meta["sha256"])
+        if os.path.exists(blob_path):
+            if time.time() - meta["checked_at"] < max_age:
+                os.utime(blob_path)
+                return blob_path
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 304:
+            meta["checked_at"] = time.time()
+            _write_json(meta_path, meta)
+            os.utime(blob_path)
+            return blob_path
+        if response.status_code != 200:
+            raise Exception(f"Failed to download file: {url}")
+
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    digest.update(chunk)
+                    file.write(chunk)
+            blob_path = os.path.join(blobs_dir, digest.hexdigest())
+            os.replace(tmp_path, blob_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        _write_json(
+            meta_path,
+            {
+                "sha256": digest.hexdigest(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "checked_at": time.time(),
+            },
+        )
+
+    _evict_images(keep=blob_path)
+
+    return blob_path
 
-    with open(filepath, "wb") as file:
-        file.write(response.content)
+
+def download_file(url, filepath):
+    """Download a file from a URL and save it to a local file path, through the image cache."""
+    try:
+        shutil.copyfile(cached_download(url), filepath)
+    except FileNotFoundError:
+        # another run evicted the cached copy before it was copied: download it again
+        shutil.copyfile(cached_download(url), filepath)
 
 
 def location_remap(group):
@@ -215,6 +395,13 @@ def get_state_from_postal(code):
     return ""
 
 
+def _unique_image_path(url, prefix):
+    suffix = os.path.splitext(urlsplit(url or "").path)[1] or ".png"
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=suffix)
+    os.close(fd)
+    return path
+
+
 def generate_mpv(group, is_new):
     """summary"""
 
@@ -247,8 +434,9 @@ def generate_mpv(group, is_new):
         ]
 
     if is_new:
-        cover_image_path = "sandbox_cover.png"
-        logo_image_path = "sandbox_logo.png"
+        # unique per run so concurrent runs never overwrite each other's images
+        cover_image_path = _unique_image_path(group.get("CoverPicture"), "cover_")
+        logo_image_path = _unique_image_path(group.get("Logo"), "logo_")
 
         download_file(group.get("CoverPicture"), cover_image_path)
         download_file(group.get("Logo"), logo_image_path)
@@ -1,5 +1,7 @@
 import os
 
+import requests
+
 from src.core.clients.hivebrite_ import HivebriteClient
 from src.sandbox.flows.club_registration.helper import generate_mpv
 
@@ -95,24 +97,21 @@ def create_hivebrite_group(data: dict):
     return status, results
 
 
-def get_hivebrite_groups(updated_since: str):
-    """getting region topic ids"""
-    page = 1
-    per_page = 30
+def get_hivebrite_groups(updated_since: str, per_page: int = 100):
+    """Groups updated since `updated_since`, fetched a few pages at a time.
+    Raises requests.exceptions.RequestException when any page fails."""
     hivebrite_client = HivebriteClient()
     all_results = []
 
-    while True:
-        endpoint = f"/api/admin/v2/topics?updated_since={updated_since}&page={page}&per_page={per_page}"
-        print(endpoint)
-        status, results = hivebrite_client.get_(endpoint=endpoint)
-
-        if status != "success" or len(results["groups"]) < per_page:
-            break
-
-        all_results.extend(results["groups"])
-
-        page += 1
+    try:
+        for group in hivebrite_client.paginate_(
+            "/api/admin/v2/topics", "groups", per_page=per_page, updated_since=updated_since
+        ):
+            all_results.append(group)
+    except requests.exceptions.RequestException as exc:
+        # a partial list would read as "no such group": fail instead
+        print(f"Error fetching Hivebrite groups after {len(all_results)} groups: {exc}")
+        raise
 
     return all_results
 
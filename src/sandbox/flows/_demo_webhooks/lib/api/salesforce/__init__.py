@@ -1,44 +1,78 @@
-from src.core.clients.salesforce_ import SalesforceClient
+from src.core.clients.salesforce_ import SalesforceClient, SalesforceNameIndex
+
+_club_index = None
 
 
 def search_for_club(club_name: str):
     salesforce_client = SalesforceClient()
-    club = salesforce_client.query_all_(
-        f"SELECT Id, c4g_Group_Id__c, c4g_Email__c, Name FROM c4g_Club_Chapter__c WHERE Name = '{club_name}'"
+    club = salesforce_client.query_bound_(
+        "SELECT Id, c4g_Group_Id__c, c4g_Email__c, Name FROM c4g_Club_Chapter__c WHERE Name = {club_name}",
+        {"club_name": club_name},
     )
 
     return club
 
 
+def find_club(club_name: str):
+    """Chapters named club_name (any case), from the local club name index. While the
+    index is not built yet or cannot be read, Salesforce is queried directly."""
+    global _club_index
+    if _club_index is None:
+        _club_index = SalesforceNameIndex(
+            "c4g_Club_Chapter__c", fields=("Id", "c4g_Group_Id__c", "c4g_Email__c", "Name")
+        )
+
+    clubs = _club_index.lookup(club_name)
+    if clubs is None:
+        clubs = search_for_club(club_name).get("records", [])
+
+    return clubs
+
+
+def chapter_record(data: dict):
+    """Chapter fields for a new Hivebrite group"""
+    group_ = data["new_group"]
+    return {
+        "Name": group_["name"],
+        "c4g_Date_Founded__c": group_["created_at"],
+        "c4g_Email__c": data["form_data"]["Email"],
+        "UNF_CC_Girl_Up_Club_Type__c": "Community Org",
+        "Group_Description__c": group_["description"],
+        "c4g_Group_Id__c": group_["id"],
+        "HivebriteCreation__c": data["success"],
+        "HivebriteCreationContext__c": data["hivebrite_creation_context"],
+        "Latitude_Longitude__Latitude__s": data.get("lat_", ""),
+        "Latitude_Longitude__Longitude__s": data.get("long_", ""),
+        "c4g_Country__c": group_["location"]["country_code"],
+        "Country_Name__c": group_["location"]["country"],
+        "c4g_Girl_Up_Region__c": data["form_data"]["Region"],
+        "Girl_Up_Sub_Region__c": data["form_data"]["SubRegion"],
+        "c4g_City__c": group_["location"]["city"],
+        "c4g_Postal_Code__c": group_["location"]["postal_code"],
+        "c4g_State__c": group_["location"].get("state", ""),
+        "RecordTypeId": "0121N0000019C39QAE",
+    }
+
+
+def contact_record(data: dict):
+    """Contact fields for the club's Hivebrite user"""
+    user = data.get("user")
+
+    return {
+        "Email": user.get("email"),
+        "FirstName": user.get("firstname"),
+        "LastName": user.get("lastname"),
+        "Hivebrite_User_ID__c": user.get("id"),
+    }
+
+
 def create_chapter(data: dict):
     """Create Chapter"""
     results = None
     salesforce_client = SalesforceClient()
 
     if "new_group" in data.keys():
-        group_ = data["new_group"]
-        chapter_ = {
-            "Name": group_["name"],
-            "c4g_Date_Founded__c": group_["created_at"],
-            "c4g_Email__c": data["form_data"]["Email"],
-            "UNF_CC_Girl_Up_Club_Type__c": "Community Org",
-            "Group_Description__c": group_["description"],
-            "c4g_Group_Id__c": group_["id"],
-            "HivebriteCreation__c": data["success"],
-            "HivebriteCreationContext__c": data["hivebrite_creation_context"],
-            "Latitude_Longitude__Latitude__s": data.get("lat_", ""),
-            "Latitude_Longitude__Longitude__s": data.get("long_", ""),
-            "c4g_Country__c": group_["location"]["country_code"],
-            "Country_Name__c": group_["location"]["country"],
-            "c4g_Girl_Up_Region__c": data["form_data"]["Region"],
-            "Girl_Up_Sub_Region__c": data["form_data"]["SubRegion"],
-            "c4g_City__c": group_["location"]["city"],
-            "c4g_Postal_Code__c": group_["location"]["postal_code"],
-            "c4g_State__c": group_["location"].get("state", ""),
-            "RecordTypeId": "0121N0000019C39QAE",
-        }
-
-        results = salesforce_client.create_("c4g_Club_Chapter__c", chapter_)
+        results = salesforce_client.create_("c4g_Club_Chapter__c", chapter_record(data))
 
     if "id" in results.keys():
         print(f"Chapter created/exists @ id: {results.get('id')} 🚀")
@@ -49,15 +83,8 @@ def create_chapter(data: dict):
 def create_contact(data: dict):
     """Create Contact"""
     salesforce_client = SalesforceClient()
-    user = data.get("user")
 
-    contact_ = {
-        "Email": user.get("email"),
-        "FirstName": user.get("firstname"),
-        "LastName": user.get("lastname"),
-        "Hivebrite_User_ID__c": user.get("id"),
-    }
-    results = salesforce_client.create_("Contact", contact_)
+    results = salesforce_client.create_("Contact", contact_record(data))
 
     if "id" in results.keys():
         print(f"Contact created/exists @ id: {results.get('id')} 🚀")
@@ -65,9 +92,9 @@ def create_contact(data: dict):
     return results
 
 
-def create_constituent(data: dict, chapter: dict, contact: dict):
+def create_constituent(data: dict, chapter: dict, contact: dict, salesforce_client=None):
     """Create Constituent"""
-    salesforce_client = SalesforceClient()
+    salesforce_client = salesforce_client or SalesforceClient()
 
     constituent_ = {"Chapter__c": chapter["id"], "Contact__c": contact["id"]}
     results = salesforce_client.create_("Constituent_Role__c", constituent_)
@@ -78,6 +105,34 @@ def create_constituent(data: dict, chapter: dict, contact: dict):
     return results
 
 
+def create_club_records(data: dict):
+    """Create Contact, Chapter and Constituent in two round trips.
+
+    Contact and Chapter go out in one sObject Collections call. Either may already
+    exist, in which case the duplicate resolves to the existing id, so the
+    Constituent that links them is created afterwards rather than in one composite
+    graph, which would roll back on the first duplicate.
+    """
+    salesforce_client = SalesforceClient()
+
+    contact, chapter = salesforce_client.create_many_(
+        None,
+        [
+            {"attributes": {"type": "Contact"}, **contact_record(data)},
+            {"attributes": {"type": "c4g_Club_Chapter__c"}, **chapter_record(data)},
+        ],
+    )
+    for name, results in (("Contact", contact), ("Chapter", chapter)):
+        if "id" in results.keys():
+            print(f"{name} created/exists @ id: {results.get('id')} 🚀")
+
+    constituent = {}
+    if "id" in contact.keys() and "id" in chapter.keys():
+        constituent = create_constituent(data, chapter, contact, salesforce_client)
+
+    return contact, chapter, constituent
+
+
 def weekly_club_registration_summary(date_range):
     salesforce_client = SalesforceClient()
 